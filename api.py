@@ -0,0 +1,117 @@
+import base64
+import json
+import time
+from itertools import islice
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from config import config
+from entry_store import get_entry_store, public_entry
+from search_index import get_search_index
+from snapshot import entry_key, snapshot_store
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+def encode_cursor(entry):
+    raw = json.dumps([entry['published_ts'], entry_key(entry)])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return (timestamp, entry_id) or raise ValueError"""
+    try:
+        timestamp, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(timestamp), str(entry_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def iter_matching(snapshot, category=None, source=None, hours=None, before=None):
+    """Yield entries newest first that match the filters"""
+    cutoff = time.time() - hours * 3600 if hours else None
+    for entry in snapshot.iter_dated(before):
+        if cutoff is not None and entry['published_ts'] <= cutoff:
+            break
+        if category and entry.get('category') != category:
+            continue
+        if source and entry.get('source') != source:
+            continue
+        yield entry
+
+def parse_int(name, default=None, minimum=0):
+    """Integer query argument of at least minimum; raises ValueError"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    value = int(value)
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value
+
+def parse_filters():
+    """Read filter arguments from the request; raises ValueError"""
+    args = request.args
+    hours = args.get('hours')
+    cursor = args.get('cursor')
+    return {
+        'category': args.get('category'),
+        'source': args.get('source'),
+        'hours': float(hours) if hours else None,
+        'before': decode_cursor(cursor) if cursor else None,
+    }
+
+@api.route('/entries')
+def entries():
+    """Entries newest first with cursor pagination.
+
+    Query parameters: category, source, hours, cursor, limit and
+    format=ndjson to stream every matching entry, one JSON object per line.
+    """
+    try:
+        filters = parse_filters()
+        limit = parse_int('limit', minimum=1)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'ndjson':
+        # Stream straight from the entry store's cursor
+        hours = filters.pop('hours')
+        matching = get_entry_store().iter_entries(
+            since_ts=time.time() - hours * 3600 if hours else None, **filters
+        )
+        if limit:
+            matching = islice(matching, limit)
+
+        def generate():
+            for entry in matching:
+                yield json.dumps(public_entry(entry), ensure_ascii=False) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    snapshot = snapshot_store.current()
+    matching = iter_matching(snapshot, **filters)
+    page_size = min(limit or config['api']['page_size'], config['api']['max_page_size'])
+    page = list(islice(matching, page_size + 1))
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return jsonify({
+        'generation': snapshot.generation,
+        'entries': [public_entry(entry) for entry in page[:page_size]],
+        'next_cursor': next_cursor
+    })
+
+@api.route('/search')
+def search():
+    """BM25-ranked search. Query parameters: q, category, hours, limit, offset"""
+    query = request.args.get('q', '').strip()
+    try:
+        hours = float(request.args['hours']) if request.args.get('hours') else None
+        limit = min(parse_int('limit', config['search']['page_size'], minimum=1),
+                    config['api']['max_page_size'])
+        offset = parse_int('offset', 0, minimum=0)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results, total = get_search_index().search(
+        query, category=request.args.get('category'), hours=hours, limit=limit, offset=offset
+    )
+    return jsonify({
+        'query': query,
+        'total': total,
+        'results': [dict(public_entry(entry), score=entry['score']) for entry in results]
+    })
@@ -1,10 +1,40 @@
-from flask import Flask, render_template, url_for, request
-from feed_parser import get_feeds
+import multiprocessing
+import os
+from flask import Flask, render_template, url_for, request, make_response
 from collections import defaultdict
 from date_utils import DateHandler
 from config import config
+from entry_store import entry_key
+from api import api
+from metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from page_cache import PageCache
+from search_index import get_search_index
+from snapshot import snapshot_store
 
 app = Flask(__name__, static_url_path='/static')
+app.register_blueprint(api)
+page_cache = PageCache()
+
+# Time filter options
+TIME_FILTERS = [
+    {'hours': 24, 'label': 'Last 24 hours'},
+    {'hours': 48, 'label': 'Last 2 days'},
+    {'hours': 168, 'label': 'Last week'},
+    {'hours': 720, 'label': 'Last month'}
+]
+CACHEABLE_FILTERS = {time_filter['hours'] for time_filter in TIME_FILTERS}
+
+# In thread mode the web process runs ingestion itself; in external mode
+# `python -m ingestion` does it and we only read the snapshot it writes.
+# Under the debug reloader only the serving child starts the worker, and
+# spawned pool workers, which re-import `python app.py` as __mp_main__,
+# never do.
+_reloader_parent = (__name__ == '__main__' and config['api']['debug']
+                    and os.environ.get('WERKZEUG_RUN_MAIN') != 'true')
+if (config['ingestion']['mode'] == 'thread' and not _reloader_parent
+        and multiprocessing.parent_process() is None):
+    from ingestion import start_background_worker
+    start_background_worker()
 
 @app.route('/')
 def hello_world():
@@ -14,20 +44,49 @@ def hello_world():
     except ValueError:
         time_filter = 24  # Default to 24 hours if invalid value
     
-    # Get all feeds
-    feeds = get_feeds()
+    # Read the latest published snapshot; never fetch inline
+    snapshot = snapshot_store.current()
+    if time_filter not in CACHEABLE_FILTERS:
+        return render_index(snapshot, time_filter)
+    
+    # The page only changes when ingestion publishes a new generation
+    page = page_cache.get_or_render(
+        snapshot.generation, time_filter, lambda: render_index(snapshot, time_filter)
+    )
+    use_gzip = 'gzip' in request.accept_encodings
+    etag = page.gzip_etag if use_gzip else page.etag
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(page.gzip_body if use_gzip else page.body)
+        response.content_type = 'text/html; charset=utf-8'
+        if use_gzip:
+            response.content_encoding = 'gzip'
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response
+
+def render_index(snapshot, time_filter):
+    """Render the index page for one time window of a snapshot"""
+    # Entries are indexed by publish time, so the window is a binary search
+    filtered_feeds = snapshot.within_hours(time_filter)
     
-    # Filter feeds based on age
-    filtered_feeds = []
-    date_handler = DateHandler()
-    for feed in feeds:
-        age_hours = date_handler.get_age_hours(feed.get('published', 'No date'))
-        if age_hours is not None and age_hours < time_filter:
-            filtered_feeds.append(feed)
+    # Collapse near-duplicates into the story they repeat
+    visible_keys = {entry_key(feed) for feed in filtered_feeds}
+    also_in = defaultdict(list)
+    stories = []
+    for feed in filtered_feeds:
+        original = feed.get('duplicate_of')
+        if original and original in visible_keys:
+            also_in[original].append(feed)
+        else:
+            stories.append(feed)
     
     # Organize filtered feeds by category
     categorized_feeds = defaultdict(list)
-    for feed in filtered_feeds:
+    for feed in stories:
         category = feed.get('category', 'Other')
         categorized_feeds[category].append(feed)
     
@@ -37,20 +96,58 @@ def hello_world():
         key=lambda x: ('ZZZ' if x == 'Other' else x)
     )
     
-    # Time filter options
-    time_filters = [
-        {'hours': 24, 'label': 'Last 24 hours'},
-        {'hours': 48, 'label': 'Last 2 days'},
-        {'hours': 168, 'label': 'Last week'},
-        {'hours': 720, 'label': 'Last month'}
-    ]
-    
     return render_template('index.html',
                          categorized_feeds=categorized_feeds,
                          categories=sorted_categories,
-                         time_filters=time_filters,
+                         time_filters=TIME_FILTERS,
+                         current_filter=time_filter,
+                         total_articles=len(stories),
+                         also_in=also_in,
+                         generation=snapshot.generation,
+                         live_updates=config['live_updates'])
+
+@app.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    category = request.args.get('category') or None
+    try:
+        time_filter = int(request.args.get('time_filter', 0)) or None
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        time_filter, page = None, 1
+    
+    page_size = config['search']['page_size']
+    results, total = get_search_index().search(
+        query, category=category, hours=time_filter,
+        limit=page_size, offset=(page - 1) * page_size
+    )
+    categories = sorted(config['keywords']['categories']) + [
+        config['keywords']['fallback']['default_category']
+    ]
+    
+    return render_template('search.html',
+                         query=query,
+                         results=results,
+                         total=total,
+                         page=page,
+                         has_next=page * page_size < total,
+                         categories=categories,
+                         current_category=category,
+                         time_filters=TIME_FILTERS,
                          current_filter=time_filter)
 
+@app.route('/metrics')
+def metrics():
+    # Pipeline metrics are only populated where ingestion runs; in
+    # external mode scrape `python -m ingestion --metrics-port` instead
+    response = make_response(registry.render())
+    response.content_type = METRICS_CONTENT_TYPE
+    return response
+
+@app.template_filter('entry_key')
+def entry_key_filter(entry):
+    return entry_key(entry)
+
 @app.template_filter('format_date')
 def format_date_filter(date_str):
     return DateHandler.format_date(date_str)
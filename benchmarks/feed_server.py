@@ -0,0 +1,128 @@
+"""Local stand-in feed server for benchmarks.
+
+Serves deterministic synthetic RSS 2.0 or Atom feeds at
+/feed/<n>.xml with configurable entry count, body size, latency and
+ETag behaviour.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from email.utils import formatdate
+from aiohttp import web
+
+WORDS = (
+    "army defence missile drone navy security cyber attack border exercise "
+    "minister government contract tank artillery radar satellite industry "
+    "festival concert museum exhibition market investment startup research "
+    "energy climate technology software network Warsaw Poland Ukraine NATO"
+).split()
+
+class FeedServer:
+    """Synthetic feed server running on its own thread and event loop"""
+
+    def __init__(self, feeds=10, entries=30, description_words=60, latency_ms=0,
+                 etag=True, atom_every=0, new_entries_per_request=0, seed=1, port=0):
+        self.feeds = feeds
+        self.entries = entries
+        self.description_words = description_words
+        self.latency = latency_ms / 1000
+        self.etag = etag
+        self.atom_every = atom_every  # every Nth feed is Atom; 0 = all RSS
+        self.new_entries_per_request = new_entries_per_request
+        self.seed = seed
+        self.port = port
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._versions = {}
+        self._started = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._runner = None
+        self.now = int(time.time())
+
+    @property
+    def urls(self):
+        return [f"http://127.0.0.1:{self.port}/feed/{n}.xml" for n in range(self.feeds)]
+
+    def _text(self, rng, count):
+        return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+    def _render(self, n, version):
+        """Feed body for feed n; each version adds new_entries_per_request entries"""
+        atom = self.atom_every and n % self.atom_every == 0
+        items = []
+        first = version * self.new_entries_per_request
+        for i in range(first, first + self.entries):
+            rng = random.Random(f"{self.seed}-{n}-{i}")
+            title = self._text(rng, 8).capitalize()
+            description = self._text(rng, self.description_words)
+            # Fixed per entry, so entries carried over keep their content
+            published = self.now - max(0, 1000 - i) * 600
+            link = f"http://127.0.0.1:{self.port}/article/{n}/{i}"
+            if atom:
+                items.append(
+                    f"<entry><title>{title}</title><id>{link}</id><link href=\"{link}\"/>"
+                    f"<updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(published))}</updated>"
+                    f"<summary>{description}</summary></entry>"
+                )
+            else:
+                items.append(
+                    f"<item><title>{title}</title><link>{link}</link><guid>{link}</guid>"
+                    f"<pubDate>{formatdate(published, usegmt=True)}</pubDate>"
+                    f"<description>{description}</description></item>"
+                )
+        items.reverse()
+        if atom:
+            return ('<?xml version="1.0" encoding="utf-8"?>'
+                    '<feed xmlns="http://www.w3.org/2005/Atom">'
+                    f'<title>Bench feed {n}</title>{"".join(items)}</feed>')
+        return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+                f'<title>Bench feed {n}</title><ttl>30</ttl>{"".join(items)}</channel></rss>')
+
+    async def _handle(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        n = int(request.match_info['n'])
+        version = self._versions.get(n, 0)
+        if self.new_entries_per_request:
+            self._versions[n] = version + 1
+        body = self._render(n, version).encode('utf-8')
+        headers = {'Content-Type': 'application/rss+xml; charset=utf-8'}
+        if self.etag:
+            tag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            headers['ETag'] = tag
+            if request.headers.get('If-None-Match') == tag:
+                self.not_modified += 1
+                return web.Response(status=304, headers={'ETag': tag})
+        self.bytes_sent += len(body)
+        return web.Response(body=body, headers=headers)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='bench-feed-server', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_get('/feed/{n}.xml', self._handle)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
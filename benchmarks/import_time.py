@@ -0,0 +1,106 @@
+"""Import-time check for the web and ingestion entry points.
+
+Runs `python -X importtime` in a fresh interpreter for each entry point,
+reports the total and the heaviest packages, and fails if the web path
+pulls in ingestion-only libraries or goes over its time budget.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --max-web-ms 400 --output results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries only ingestion needs; the web process must not load them
+WEB_FORBIDDEN = ('aiohttp', 'feedparser', 'yake', 'deep_translator', 'numpy', 'networkx',
+                 'feed_parser', 'keyword_extractor', 'translation')
+
+# The in-process worker would import the ingestion stack from its thread
+# while we measure, so the web path is imported in external mode
+ENTRY_POINTS = {
+    'web': "import config; config.config['ingestion']['mode'] = 'external'; import app",
+    'ingestion': "import feed_parser",
+}
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def measure(code):
+    """Import timings of one fresh interpreter running code"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = parse_importtime(result.stderr)
+    # Skip what the interpreter imports before running our code
+    start = next((i for i, row in enumerate(rows) if row[0] == 'site'), -1) + 1
+    rows = rows[start:]
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    return {
+        'total_ms': sum(row[2] for row in rows if row[3] == 0) / 1000,
+        'modules': {row[0] for row in rows},
+        'packages': packages,
+    }
+
+def run(entry_point, repeat):
+    code = ENTRY_POINTS[entry_point]
+    measure(code)  # warm the bytecode cache
+    runs = [measure(code) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run['total_ms'])
+    heaviest = sorted(best['packages'].items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        'total_ms': round(best['total_ms'], 1),
+        'modules': len(best['modules']),
+        'heaviest_ms': {name: round(us / 1000, 1) for name, us in heaviest},
+        'loaded_modules': best['modules'],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per entry point; the best is kept')
+    parser.add_argument('--max-web-ms', type=float, help='fail if importing the web app takes longer')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = {name: run(name, args.repeat) for name in ENTRY_POINTS}
+    failures = []
+    forbidden = sorted(
+        name for name in results['web'].pop('loaded_modules')
+        if name.split('.')[0] in WEB_FORBIDDEN
+    )
+    results['ingestion'].pop('loaded_modules')
+    if forbidden:
+        failures.append(f"web path imports ingestion-only modules: {', '.join(forbidden)}")
+    if args.max_web_ms and results['web']['total_ms'] > args.max_web_ms:
+        failures.append(f"web import took {results['web']['total_ms']} ms (budget {args.max_web_ms} ms)")
+
+    for name, result in results.items():
+        print(f"{name}: {result['total_ms']} ms, {result['modules']} modules")
+        for package, ms in result['heaviest_ms'].items():
+            print(f"    {package:<24} {ms:>8} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'failures': failures}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Offline benchmark of the ingestion pipeline and the / route.
+
+Starts the local feed server, swaps in the fake translation backend and
+isolated cache/data directories, runs get_feeds_async() for a number of
+cycles and then load-tests / with the Flask test client.
+
+    python -m benchmarks.run --feeds 20 --entries 30 --latency-ms 50
+
+Results are printed and saved to benchmarks/results/ as JSON, named by
+date and git commit, so runs can be compared across commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+from config import config
+from benchmarks.feed_server import FeedServer
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=10)
+    parser.add_argument('--entries', type=int, default=30, help='entries per feed')
+    parser.add_argument('--description-words', type=int, default=60)
+    parser.add_argument('--latency-ms', type=float, default=20, help='feed server latency')
+    parser.add_argument('--no-etag', action='store_true', help='feed server sends no ETags')
+    parser.add_argument('--atom-every', type=int, default=3, help='every Nth feed is Atom (0 = none)')
+    parser.add_argument('--new-entries', type=int, default=2, help='new entries per feed per cycle')
+    parser.add_argument('--translate-ms', type=float, default=5, help='fake backend latency per call')
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=500, help='page requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<date>-<commit>.json)')
+    return parser.parse_args(argv)
+
+def configure(workdir):
+    """Point every cache and store at workdir and go fully offline"""
+    config['cache']['directory'] = os.path.join(workdir, 'cache')
+    config['cache']['feed']['duration_hours'] = 0  # revalidate every cycle
+    config['feeds']['output']['directory'] = os.path.join(workdir, 'data')
+    config['reports']['directory'] = os.path.join(workdir, 'reports')
+    config['logging']['file'] = os.path.join(workdir, 'app.log')
+    config['translation']['backend'] = 'fake'
+    # The rate limit protects the real backend's quota; here it would only
+    # measure itself
+    config['translation']['governor']['rate_per_second'] = 0
+    config['ingestion']['mode'] = 'external'
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return 'unknown'
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {'self': round(own, 1), 'children': round(children, 1)}
+
+def percentiles(samples):
+    samples = sorted(samples)
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+    }
+
+def bench_ingestion(feed_parser, server, cycles):
+    results = []
+    engine = feed_parser.get_translation_engine()
+    for cycle in range(cycles):
+        requests_before = server.requests
+        not_modified_before = server.not_modified
+        bytes_before = server.bytes_sent
+        stats_before = dict(engine.stats)
+
+        start = time.perf_counter()
+        entries = asyncio.run(feed_parser.get_feeds_async(server.urls))
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            'cycle': cycle + 1,
+            'seconds': round(elapsed, 3),
+            'feeds': len(server.urls),
+            'entries': len(entries),
+            'feeds_per_sec': round(len(server.urls) / elapsed, 2),
+            'entries_per_sec': round(len(entries) / elapsed, 2),
+            'http_requests': server.requests - requests_before,
+            'http_not_modified': server.not_modified - not_modified_before,
+            'http_bytes': server.bytes_sent - bytes_before,
+            'translation': {key: engine.stats[key] - stats_before.get(key, 0) for key in engine.stats},
+        })
+        print(f"cycle {cycle + 1}: {elapsed:.2f}s, {len(entries)} entries, "
+              f"{results[-1]['entries_per_sec']} entries/s")
+    return results
+
+def memory_per_entry(rows, decode):
+    """Bytes held per entry after decoding the stored JSON rows"""
+    if not rows:
+        return None
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        entries = [decode(row) for row in rows]
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del entries
+    return round(held / len(rows))
+
+def bench_page(app_module, requests, concurrency, cached):
+    """Load-test / across the time filters; cached=False clears the page
+    cache before every request to measure a full render"""
+    client_app = app_module.app
+    filters = [time_filter['hours'] for time_filter in app_module.TIME_FILTERS]
+
+    def hit(index):
+        if not cached:
+            app_module.page_cache.clear()
+        client = client_app.test_client()
+        start = time.perf_counter()
+        response = client.get(f"/?time_filter={filters[index % len(filters)]}",
+                              headers={'Accept-Encoding': 'gzip'})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(hit, range(requests)))
+    return percentiles(samples)
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='rssoffice-bench-')
+    configure(workdir)
+
+    # Imported after configure() so module-level paths use workdir
+    import feed_parser
+    from translation import FakeBackend
+    feed_parser.get_translation_engine().backend = FakeBackend(latency_ms=args.translate_ms)
+
+    server = FeedServer(
+        feeds=args.feeds, entries=args.entries, description_words=args.description_words,
+        latency_ms=args.latency_ms, etag=not args.no_etag, atom_every=args.atom_every,
+        new_entries_per_request=args.new_entries
+    ).start()
+    try:
+        ingestion = bench_ingestion(feed_parser, server, args.cycles)
+    finally:
+        server.stop()
+
+    from snapshot import snapshot_store
+    snapshot = snapshot_store.publish_from_store()
+    from entry_model import Entry
+    from entry_store import get_entry_store
+    rows = get_entry_store().load_entries(decode=lambda data: data)
+    memory = {
+        'dict_bytes': memory_per_entry(rows, json.loads),
+        'entry_bytes': memory_per_entry(rows, Entry.from_json),
+    }
+    import app as app_module
+    page = {
+        'render': bench_page(app_module, max(args.requests // 5, 20), args.concurrency, cached=False),
+        'cached': bench_page(app_module, args.requests, args.concurrency, cached=True),
+    }
+
+    result = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'params': vars(args),
+        'snapshot_entries': len(snapshot),
+        'memory_per_entry': memory,
+        'ingestion': ingestion,
+        'page': page,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{result['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({'page': page, 'memory_per_entry': memory,
+                      'peak_rss_mb': result['peak_rss_mb']}, indent=2))
+    print(f"Saved results to {output}")
+    return result
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import re
+from functools import lru_cache
+from config import config
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TERMINAL = None  # trie key holding the categories of a term ending at a node
+
+def tokenize(text):
+    """Lowercase word tokens with a naive plural folded away"""
+    tokens = TOKEN_RE.findall(text.lower())
+    return [token[:-1] if len(token) > 3 and token.endswith('s') else token for token in tokens]
+
+class CategoryMatcher:
+    """Scores categories for a set of keywords in one pass over their tokens.
+
+    Category terms from config are compiled once into a token trie, so a
+    keyword costs O(tokens x longest term) no matter how many terms are
+    configured. A keyword equal to a term scores exact_match, a term found
+    inside a keyword scores partial_match; both are multiplied by the
+    category weight.
+    """
+
+    def __init__(self, categories, exact_score, partial_score, fallback):
+        self.categories = list(categories)
+        self.weights = {name: data.get('weight', 1.0) for name, data in categories.items()}
+        self.exact_score = exact_score
+        self.partial_score = partial_score
+        self.default_category = fallback['default_category']
+        self.time_category = fallback['time_category']
+        self.time_words = frozenset(tokenize(' '.join(fallback['time_related_words'])))
+
+        self.trie = {}
+        self.max_depth = 0
+        for name, data in categories.items():
+            for term in data['terms']:
+                tokens = tokenize(str(term))
+                if not tokens:
+                    continue
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(TERMINAL, set()).add(name)
+                self.max_depth = max(self.max_depth, len(tokens))
+
+    @classmethod
+    def from_config(cls):
+        kw_config = config['keywords']
+        return cls(
+            kw_config['categories'],
+            kw_config['scoring']['exact_match'],
+            kw_config['scoring']['partial_match'],
+            kw_config['fallback']
+        )
+
+    def _match(self, tokens):
+        """Yield (categories, start, end) for every term occurrence"""
+        for start in range(len(tokens)):
+            node = self.trie
+            for end in range(start, min(len(tokens), start + self.max_depth)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if TERMINAL in node:
+                    yield node[TERMINAL], start, end + 1
+
+    def score(self, keywords):
+        """Return ({category: weighted score}, {category: exact matches})"""
+        scores = dict.fromkeys(self.categories, 0.0)
+        exact = dict.fromkeys(self.categories, 0)
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            exact_hits = set()
+            partial_hits = set()
+            for categories, start, end in self._match(tokens):
+                if start == 0 and end == len(tokens):
+                    exact_hits.update(categories)
+                else:
+                    partial_hits.update(categories)
+            # A keyword counts once per category, as an exact match if it can
+            for category in exact_hits:
+                scores[category] += self.exact_score * self.weights[category]
+                exact[category] += 1
+            for category in partial_hits - exact_hits:
+                scores[category] += self.partial_score * self.weights[category]
+        return scores, exact
+
+    def confidences(self, keywords):
+        """Return each category's share of the total score"""
+        scores, _ = self.score(keywords)
+        total = sum(scores.values())
+        if not total:
+            return dict.fromkeys(self.categories, 0.0)
+        return {category: score / total for category, score in scores.items()}
+
+    def categorize(self, keywords):
+        """Return (category, confidence) for one entry's keywords"""
+        scores, exact = self.score(keywords)
+        total = sum(scores.values())
+        if total > 0:
+            # Highest score wins; ties go to more exact matches, then config order
+            best = max(self.categories, key=lambda category: (scores[category], exact[category]))
+            return best, scores[best] / total
+
+        # Fall back to the time category for schedule-like content
+        if any(token in self.time_words for keyword in keywords for token in tokenize(keyword)):
+            return self.time_category, 0.0
+        return self.default_category, 0.0
+
+    def categorize_many(self, keyword_lists):
+        """Categorize many entries at once, preserving order"""
+        return [self.categorize(keywords) for keywords in keyword_lists]
+
+@lru_cache(maxsize=1)
+def get_category_matcher():
+    """Matcher compiled from config, built once per process"""
+    return CategoryMatcher.from_config()
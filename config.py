@@ -7,7 +7,8 @@ def load_config():
     config_path = Path(__file__).parent / 'config.yaml'
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            # The C loader, where PyYAML was built with libyaml
+            return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
     except Exception as e:
         print(f"Error loading config: {e}")
         return {}
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone, timedelta
 from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from logger import logger
 
 class DateHandler:
@@ -31,10 +32,31 @@ class DateHandler:
             logger.error(f"Date parsing error: {e}")
             return None
 
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def parse_timestamp(date_str):
+        """Parse a date string once into a UTC epoch (int), memoized"""
+        parsed_date = DateHandler.parse_date(date_str)
+        if not parsed_date:
+            return None
+        if parsed_date.tzinfo is None:
+            parsed_date = parsed_date.replace(tzinfo=timezone.utc)
+        return int(parsed_date.timestamp())
+
+    @staticmethod
+    def to_datetime(value):
+        """Accept a UTC epoch or a date string and return an aware datetime"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return datetime.fromtimestamp(value, timezone.utc)
+        timestamp = DateHandler.parse_timestamp(value) if isinstance(value, str) else None
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
     @staticmethod
     def get_age_hours(date_str):
         """Calculate how many hours old an article is"""
-        parsed_date = DateHandler.parse_date(date_str)
+        parsed_date = DateHandler.to_datetime(date_str)
         if not parsed_date:
             return None
             
@@ -68,7 +90,7 @@ class DateHandler:
     @staticmethod
     def format_date(date_str):
         """Format date as day and month"""
-        parsed_date = DateHandler.parse_date(date_str)
+        parsed_date = DateHandler.to_datetime(date_str)
         if not parsed_date:
             return 'No date'
             
@@ -0,0 +1,113 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from config import config
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+TAG_RE = re.compile(r"<[^>]+>")
+BITS = 64
+BANDS = 8
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+def simhash(text):
+    """64-bit SimHash of the words of text.
+
+    Single words rather than shingles: titles and teasers are short, and
+    shingles make one edited word flip too many bits.
+    """
+    words = WORD_RE.findall(TAG_RE.sub(' ', text).lower())
+    if not words:
+        return 0
+    counts = [0] * BITS
+    for word in words:
+        value = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            counts[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit in range(BITS):
+        if counts[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+class DuplicateRecord:
+    """An entry seen by the index; entry is filled in once processed"""
+    __slots__ = ('fingerprint', 'key', 'added_at', 'entry', 'future')
+
+    def __init__(self, fingerprint, key, entry=None, future=None):
+        self.fingerprint = fingerprint
+        self.key = key
+        self.added_at = time.time()
+        self.entry = entry
+        self.future = future
+
+class DuplicateIndex:
+    """Bounded, time-windowed SimHash index for near-duplicate lookup.
+
+    Fingerprints are split into eight 8-bit bands; two fingerprints within
+    seven bits of each other share at least one band, so a lookup only
+    compares against the entries in eight buckets. Records older than
+    window_hours, or beyond max_items, are evicted oldest first.
+    """
+
+    def __init__(self, max_distance=None, window_hours=None, max_items=None):
+        dedup_config = config['dedup']
+        self.max_distance = max_distance if max_distance is not None else dedup_config['max_distance']
+        self.window = (window_hours or dedup_config['window_hours']) * 3600
+        self.max_items = max_items or dedup_config['max_items']
+        self._records = OrderedDict()
+        self._bands = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    @staticmethod
+    def _band_values(fingerprint):
+        return [(fingerprint >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+    def find(self, fingerprint, exclude=None):
+        """Return the closest record within max_distance, other than the
+        one keyed exclude, or None"""
+        self._evict()
+        best = None
+        best_distance = self.max_distance + 1
+        for band, value in enumerate(self._band_values(fingerprint)):
+            for key in self._bands[band].get(value, ()):
+                if key == exclude:
+                    continue
+                record = self._records[key]
+                distance = (record.fingerprint ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best, best_distance = record, distance
+        return best
+
+    def add(self, fingerprint, key, entry=None, future=None):
+        if key in self._records:
+            self._remove(key)
+        record = DuplicateRecord(fingerprint, key, entry, future)
+        self._records[key] = record
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._bands[band].setdefault(value, set()).add(key)
+        self._evict()
+        return record
+
+    def _remove(self, key):
+        record = self._records.pop(key)
+        for band, value in enumerate(self._band_values(record.fingerprint)):
+            bucket = self._bands[band].get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band][value]
+
+    def _evict(self):
+        cutoff = time.time() - self.window
+        while self._records:
+            key, record = next(iter(self._records.items()))
+            if record.added_at >= cutoff and len(self._records) <= self.max_items:
+                break
+            self._remove(key)
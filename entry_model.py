@@ -0,0 +1,108 @@
+"""Compact in-memory entry model.
+
+Every web worker holds all retained entries in its snapshot. As dicts,
+each entry carries its own hash table and its own copies of the source,
+category and keyword strings. Entry keeps the fields in __slots__,
+interns the strings that repeat across entries and keeps the publish time
+only as an int epoch; the `published` string is rebuilt when asked for.
+
+Entry reads like the dicts it replaces (entry['title'], entry.get(...)),
+so templates, the API and entry_key() accept either.
+"""
+import json
+import sys
+from email.utils import formatdate
+from date_utils import DateHandler
+
+FIELDS = ('id', 'title', 'link', 'source', 'published_ts', 'description', 'keywords',
+          'category', 'category_confidence', 'content_hash', 'duplicate_of', 'translation_pending')
+# Everything readable through get() and []
+ATTRIBUTES = frozenset(FIELDS + ('published',))
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def flatten(value):
+    """Flatten a {'translation': ...} record that older runs stored"""
+    if isinstance(value, dict):
+        return value.get('translation', '')
+    return value
+
+class Entry:
+    """One processed feed entry; unknown fields are kept in extra"""
+    __slots__ = FIELDS + ('_published', 'extra')
+
+    def __init__(self, id=None, title='', link='', source=None, published_ts=None,
+                 description='', keywords=(), category=None, category_confidence=None,
+                 content_hash=None, duplicate_of=None, translation_pending=False,
+                 published=None, extra=None):
+        if published_ts is None:
+            published_ts = DateHandler.parse_timestamp(published)
+        self.id = id
+        self.title = flatten(title)
+        self.link = link
+        self.source = intern_text(source)
+        self.published_ts = int(published_ts) if published_ts is not None else None
+        self.description = flatten(description)
+        self.keywords = tuple(intern_text(keyword) for keyword in keywords or ())
+        self.category = intern_text(category)
+        self.category_confidence = category_confidence
+        self.content_hash = content_hash
+        self.duplicate_of = duplicate_of
+        self.translation_pending = bool(translation_pending)
+        # The source string is only kept when there is no timestamp to
+        # rebuild it from, e.g. 'No date'
+        self._published = intern_text(published) if self.published_ts is None else None
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {}
+        extra = None
+        for field, value in data.items():
+            if field in ATTRIBUTES:
+                known[field] = value
+            else:
+                if extra is None:
+                    extra = {}
+                extra[field] = value
+        return cls(extra=extra, **known)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls.from_dict(json.loads(data))
+
+    @property
+    def published(self):
+        if self.published_ts is not None:
+            return formatdate(self.published_ts, usegmt=True)
+        return self._published
+
+    # Dict-style access, for code written against plain dict entries
+    def get(self, field, default=None):
+        if field in ATTRIBUTES:
+            value = getattr(self, field)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(field, default)
+        return default
+
+    def __getitem__(self, field):
+        if field in ATTRIBUTES:
+            return getattr(self, field)
+        if self.extra and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def __contains__(self, field):
+        # Like a stored dict: keywords and translation_pending are only
+        # there once set
+        if field in ATTRIBUTES:
+            value = getattr(self, field)
+            if field in ('keywords', 'translation_pending'):
+                return bool(value)
+            return value is not None
+        return bool(self.extra) and field in self.extra
+
+    def __repr__(self):
+        return f"Entry({self.id!r}, {self.title!r})"
@@ -0,0 +1,329 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import config
+from date_utils import DateHandler
+from logger import logger
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['feeds']['output']['directory'])
+ENTRIES_DB_FILE = os.path.join(DATA_DIR, config['feeds']['output']['db_file'])
+# Legacy pretty-printed entries file, imported on first start
+ENTRIES_FILE = os.path.join(DATA_DIR, config['feeds']['output']['file'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    published_ts INTEGER,
+    source TEXT,
+    category TEXT,
+    content_hash TEXT,
+    data TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS entries_published ON entries (published_ts DESC, key DESC);
+CREATE INDEX IF NOT EXISTS entries_generation ON entries (generation);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('compacted_at', 0);
+"""
+
+# Full-text index over the translated text, kept in step with the entries
+# table by triggers so it is updated incrementally as entries are written.
+# FTS rows share the rowid of their entry. Queried by search_index.py.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, description, keywords, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, title, description, keywords) VALUES (
+        new.rowid, json_extract(new.data, '$.title'),
+        json_extract(new.data, '$.description'), json_extract(new.data, '$.keywords'));
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF data ON entries BEGIN
+    DELETE FROM entries_fts WHERE rowid = old.rowid;
+    INSERT INTO entries_fts (rowid, title, description, keywords) VALUES (
+        new.rowid, json_extract(new.data, '$.title'),
+        json_extract(new.data, '$.description'), json_extract(new.data, '$.keywords'));
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    DELETE FROM entries_fts WHERE rowid = old.rowid;
+END;
+"""
+
+# Fields exposed to API and live-update consumers
+PUBLIC_FIELDS = ('id', 'title', 'link', 'source', 'published', 'published_ts',
+                 'description', 'keywords', 'category', 'category_confidence')
+
+def public_entry(entry):
+    return {field: entry.get(field) for field in PUBLIC_FIELDS}
+
+def entry_key(entry):
+    """Stable identity of an entry: its GUID, else its link"""
+    return entry.get('id') or entry.get('link') or ''
+
+def normalize_entry(entry):
+    """Flatten {'translation': ...} records that older runs leaked into
+    title and description, and make sure published_ts is set"""
+    entry = dict(entry)
+    for field in ('title', 'description'):
+        value = entry.get(field)
+        if isinstance(value, dict):
+            entry[field] = value.get('translation', '')
+    if entry.get('published_ts') is None:
+        entry['published_ts'] = DateHandler.parse_timestamp(entry.get('published'))
+    return entry
+
+class EntryStore:
+    """Durable SQLite (WAL) store of processed entries.
+
+    Writers upsert only entries whose content changed, in one transaction
+    per run, and bump a generation counter; readers see either the old or
+    the new state, never a partial write. Retention by age and compaction
+    run from the ingestion worker.
+    """
+
+    def __init__(self, db_file=ENTRIES_DB_FILE, legacy_file=ENTRIES_FILE):
+        self.db_file = db_file
+        self.legacy_file = legacy_file
+        self.retention = config['feeds']['entry_age_limit_hours'] * 3600
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Stores created before auto_vacuum was set ahead of WAL mode;
+            # only a full rebuild switches it on
+            logger.info(f"Rebuilding {db_file} to enable incremental vacuum")
+            conn.execute("VACUUM")
+        self._add_updated_at()
+        conn.executescript(SEARCH_SCHEMA)
+        self._backfill_search_index()
+        self._migrate_json()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            # Must come before journal_mode=WAL to apply to a new database;
+            # existing ones need a VACUUM (see __init__). compact() relies on it
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            # Map the file instead of reading it through the page cache, so
+            # index lookups touch only the pages they need
+            conn.execute(f"PRAGMA mmap_size={config['search']['mmap_size_mb'] * 1024 * 1024}")
+            self._local.conn = conn
+        return conn
+
+    def _add_updated_at(self):
+        """Add the write time that retention uses for undated entries to
+        stores created before it existed"""
+        conn = self._connect()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+        if 'updated_at' not in columns:
+            conn.execute("ALTER TABLE entries ADD COLUMN updated_at REAL")
+            # Their write time is unknown; retention counts from now
+            conn.execute("UPDATE entries SET updated_at = ?", (time.time(),))
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_undated ON entries (updated_at) "
+                     "WHERE published_ts IS NULL")
+
+    def _backfill_search_index(self):
+        """Index entries written before the search index existed"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            done = conn.execute("SELECT value FROM meta WHERE name = 'search_indexed'").fetchone()
+            if not done:
+                conn.execute(
+                    """INSERT INTO entries_fts (rowid, title, description, keywords)
+                       SELECT rowid, json_extract(data, '$.title'),
+                              json_extract(data, '$.description'), json_extract(data, '$.keywords')
+                       FROM entries"""
+                )
+                conn.execute("INSERT INTO meta (name, value) VALUES ('search_indexed', 1)")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def connection(self):
+        """This thread's connection, for modules that query the store"""
+        return self._connect()
+
+    def generation(self):
+        """Counter bumped by every write that changes visible entries"""
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE name = 'generation'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def upsert(self, entries):
+        """Insert new entries and replace changed ones; returns the number
+        of rows written"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            generation = self.generation() + 1
+            now = time.time()
+            rows = []
+            for entry in entries:
+                entry = normalize_entry(entry)
+                key = entry_key(entry)
+                if not key:
+                    continue
+                rows.append((
+                    key, entry['published_ts'], entry.get('source'), entry.get('category'),
+                    entry.get('content_hash'), json.dumps(entry, ensure_ascii=False), generation, now
+                ))
+            # rowcount sums sqlite3_changes(), which leaves out the rows
+            # the search index triggers write
+            written = conn.executemany(
+                """INSERT INTO entries
+                   (key, published_ts, source, category, content_hash, data, generation, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       published_ts = excluded.published_ts,
+                       source = excluded.source,
+                       category = excluded.category,
+                       content_hash = excluded.content_hash,
+                       data = excluded.data,
+                       generation = excluded.generation,
+                       updated_at = excluded.updated_at
+                   WHERE excluded.data IS NOT entries.data""",
+                rows
+            ).rowcount
+            if written:
+                conn.execute("UPDATE meta SET value = ? WHERE name = 'generation'", (generation,))
+            conn.execute('COMMIT')
+            return written
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def load_entries(self, decode=json.loads):
+        """All retained entries, newest first, each built by decode from
+        its stored JSON"""
+        rows = self._connect().execute(
+            "SELECT data FROM entries ORDER BY published_ts DESC, key DESC"
+        )
+        return [decode(data) for (data,) in rows]
+
+    def iter_entries(self, category=None, source=None, since_ts=None, before=None, batch_size=500):
+        """Yield entries newest first straight from the database cursor.
+
+        before is a (published_ts, key) cursor; only dated entries are
+        returned.
+        """
+        clauses = ['published_ts IS NOT NULL']
+        params = []
+        if category:
+            clauses.append('category = ?')
+            params.append(category)
+        if source:
+            clauses.append('source = ?')
+            params.append(source)
+        if since_ts is not None:
+            clauses.append('published_ts > ?')
+            params.append(since_ts)
+        if before is not None:
+            clauses.append('(published_ts < ? OR (published_ts = ? AND key < ?))')
+            params.extend([before[0], before[0], before[1]])
+        # A dedicated connection, so a long export does not pin the
+        # thread's shared one
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            cursor = conn.execute(
+                f"SELECT data FROM entries WHERE {' AND '.join(clauses)} "
+                "ORDER BY published_ts DESC, key DESC",
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (data,) in rows:
+                    yield json.loads(data)
+        finally:
+            conn.close()
+
+    def entries_since(self, generation, limit):
+        """Entries written after generation, newest first, at most limit"""
+        rows = self._connect().execute(
+            "SELECT data FROM entries WHERE generation > ? "
+            "ORDER BY published_ts DESC, key DESC LIMIT ?",
+            (generation, limit)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def apply_retention(self, now=None):
+        """Delete entries older than feeds.entry_age_limit_hours; undated
+        entries age from when they were last written"""
+        if now is None:
+            now = time.time()
+        cutoff = now - self.retention
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = conn.execute(
+                "DELETE FROM entries WHERE published_ts < ?", (cutoff,)
+            ).rowcount
+            deleted += conn.execute(
+                "DELETE FROM entries WHERE published_ts IS NULL AND updated_at < ?", (cutoff,)
+            ).rowcount
+            if deleted:
+                conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if deleted:
+            logger.info(f"Retention removed {deleted} entries")
+        return deleted
+
+    def compact(self):
+        """Apply retention, return freed pages and truncate the WAL"""
+        deleted = self.apply_retention()
+        conn = self._connect()
+        # Each step frees one page, and execute() steps only once
+        conn.executescript("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("UPDATE meta SET value = ? WHERE name = 'compacted_at'", (time.time(),))
+        return deleted
+
+    def compacted_at(self):
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE name = 'compacted_at'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _migrate_json(self):
+        """Import the legacy feed_entries.json once; legacy_file=None
+        skips it"""
+        conn = self._connect()
+        done = conn.execute("SELECT value FROM meta WHERE name = 'json_migrated'").fetchone()
+        if done:
+            return
+        try:
+            if self.legacy_file and os.path.exists(self.legacy_file):
+                with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+                written = self.upsert(legacy)
+                logger.info(f"Migrated {written} entries from {self.legacy_file}")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('json_migrated', 1)")
+        except Exception as e:
+            logger.error(f"Error migrating feed entries: {e}")
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_entry_store():
+    """Shared EntryStore for this process, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EntryStore()
+        return _store
@@ -0,0 +1,232 @@
+"""Per-feed cache of processed entries and HTTP validators.
+
+One FeedCache per process is shared by every feed (get_feed_cache()).
+Changes only mark a feed dirty; a background timer flushes them
+flush_delay_seconds later, so a run with many feeds writes the file a
+few times rather than once per feed.
+
+The file is a marshal snapshot behind a header naming the format and the
+Python version, because marshal's format is only stable within one
+version; a snapshot from another version is ignored and the cache
+rebuilds itself. Each flush is written to a temporary file and renamed
+into place. Flushes hold a file lock and merge the feeds changed here
+into what is on disk, so several ingestion processes can share the file;
+feeds the others polled are picked up at the same time.
+
+The legacy feed_cache.json is imported once, when no snapshot exists.
+"""
+import atexit
+import json
+import marshal
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+from config import config
+from logger import logger
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['cache']['directory'])
+FEED_CACHE_FILE = os.path.join(CACHE_DIR, config['cache']['feed']['snapshot_file'])
+LEGACY_CACHE_FILE = os.path.join(CACHE_DIR, config['cache']['feed']['file'])
+HEADER = (f"rssoffice-feed-cache 1 marshal {marshal.version} "
+          f"python {sys.version_info[0]}.{sys.version_info[1]}\n").encode('ascii')
+
+def read_snapshot(cache_file):
+    """{url: cached feed} from a snapshot file; empty if it is missing,
+    damaged or written by another Python version"""
+    try:
+        with open(cache_file, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        logger.error(f"Error reading feed cache: {e}")
+        return {}
+    if not data.startswith(HEADER):
+        logger.info(f"Ignoring feed cache written by another version: {cache_file}")
+        return {}
+    try:
+        # The cache directory is ours; marshal is not for untrusted files
+        return marshal.loads(memoryview(data)[len(HEADER):])
+    except (EOFError, ValueError, TypeError) as e:
+        logger.error(f"Ignoring damaged feed cache {cache_file}: {e}")
+        return {}
+
+def write_snapshot(cache_data, cache_file):
+    """Write a snapshot; readers never see a half-written file"""
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(HEADER)
+        f.write(marshal.dumps(cache_data))
+    os.replace(temp_file, cache_file)
+
+def read_legacy_cache(cache_file):
+    """Feeds from the old JSON cache, with epoch timestamps"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Error reading legacy feed cache: {e}")
+        return {}
+    cache_data = {}
+    for url, cached in legacy.items():
+        try:
+            timestamp = datetime.fromisoformat(cached['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            timestamp = 0.0
+        cache_data[url] = {
+            'timestamp': timestamp,
+            'etag': cached.get('etag'),
+            'last_modified': cached.get('last_modified'),
+            'data': cached.get('data', []),
+        }
+    return cache_data
+
+@contextmanager
+def cache_file_lock(cache_file):
+    """Exclusive lock shared by every process writing cache_file"""
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(f"{cache_file}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class FeedCache:
+    """Processed entries and validators of each feed, keyed by feed URL"""
+
+    def __init__(self, cache_file=FEED_CACHE_FILE, legacy_file=LEGACY_CACHE_FILE,
+                 flush_delay_seconds=None):
+        feed_config = config['cache']['feed']
+        self.cache_file = cache_file
+        self.cache_duration = feed_config['duration_hours'] * 3600
+        self.flush_delay = (flush_delay_seconds if flush_delay_seconds is not None
+                            else feed_config['flush_delay_seconds'])
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_timer = None
+
+        start = time.perf_counter()
+        self.cache = read_snapshot(cache_file)
+        if not self.cache and not os.path.exists(cache_file) and legacy_file:
+            self.cache = read_legacy_cache(legacy_file)
+            if self.cache:
+                logger.info(f"Migrating {len(self.cache)} feeds from {legacy_file}")
+                self._dirty.update(self.cache)
+                self.flush()
+        logger.info(f"Loaded feed cache with {len(self.cache)} feeds "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def has_pending(self, url):
+        """Whether any cached entry of the feed still awaits translation"""
+        cached_data = self.cache.get(url)
+        return bool(cached_data) and any(entry.get('translation_pending') for entry in cached_data['data'])
+
+    def get(self, url):
+        # A feed with untranslated entries is never fresh, so they are
+        # translated again on the next run
+        cached_data = self.cache.get(url)
+        if cached_data and not self.has_pending(url):
+            if time.time() - cached_data['timestamp'] < self.cache_duration:
+                return cached_data['data']
+        return None
+
+    def get_validators(self, url):
+        """Return conditional request headers for a previously fetched feed"""
+        cached_data = self.cache.get(url)
+        if not cached_data or self.has_pending(url):
+            return {}
+        headers = {}
+        if cached_data.get('etag'):
+            headers['If-None-Match'] = cached_data['etag']
+        if cached_data.get('last_modified'):
+            headers['If-Modified-Since'] = cached_data['last_modified']
+        return headers
+
+    def touch(self, url):
+        """Mark cached data as fresh again after a 304 Not Modified"""
+        cached_data = self.cache.get(url)
+        if not cached_data:
+            return None
+        with self._lock:
+            cached_data['timestamp'] = time.time()
+            self._mark_dirty(url)
+        return cached_data['data']
+
+    def get_entries(self, url):
+        """Return previously processed entries of a feed keyed by entry id,
+        whether or not the cached feed is still fresh"""
+        cached_data = self.cache.get(url)
+        if not cached_data:
+            return {}
+        return {entry['id']: entry for entry in cached_data['data'] if entry.get('id')}
+
+    def set(self, url, data, etag=None, last_modified=None):
+        with self._lock:
+            self.cache[url] = {
+                'timestamp': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+                'data': data
+            }
+            self._mark_dirty(url)
+
+    def _mark_dirty(self, url):
+        # Called with self._lock held
+        self._dirty.add(url)
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write the feeds changed here into the file as it is now, so
+        concurrent writers (other ingestion processes) do not overwrite
+        each other, and take in the feeds they wrote"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+        with cache_file_lock(self.cache_file):
+            on_disk = read_snapshot(self.cache_file)
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                changed = {url: self.cache[url] for url in dirty if url in self.cache}
+                for url, cached_data in on_disk.items():
+                    current = self.cache.get(url)
+                    if url not in dirty and (current is None or
+                                             cached_data['timestamp'] > current['timestamp']):
+                        self.cache[url] = cached_data
+            on_disk.update(changed)
+            try:
+                write_snapshot(on_disk, self.cache_file)
+            except Exception as e:
+                logger.error(f"Error saving feed cache: {e}")
+                with self._lock:
+                    self._dirty.update(dirty)
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+def get_feed_cache():
+    """FeedCache shared by every feed in this process, loaded on first use"""
+    global _feed_cache
+    with _feed_cache_lock:
+        if _feed_cache is None:
+            _feed_cache = FeedCache()
+            atexit.register(_feed_cache.flush)
+        return _feed_cache
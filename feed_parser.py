@@ -1,300 +1,428 @@
-import feedparser
-import json
+import hashlib
 import os
+import threading
 import time
 import asyncio
-import aiohttp
-from deep_translator import GoogleTranslator
-from datetime import datetime, timedelta, timezone
-from email.utils import parsedate_to_datetime
-from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
-from keyword_extractor import KeywordExtractor
-from bs4 import BeautifulSoup
+from collections import defaultdict
+from datetime import datetime
+from keyword_extractor import KeywordExtractor, get_keyword_batcher
 from config import config
 from logger import logger
 from date_utils import DateHandler
+from dedup import DuplicateIndex, simhash
+from entry_store import entry_key, get_entry_store
+from feed_cache import get_feed_cache
+from feed_reader import FeedTooLarge, read_feed, parse_feed_async
+from scheduler import PollResult, feed_host, parse_ttl
+from metrics import (registry, diff as metrics_diff, STAGE_SECONDS, FEED_SECONDS, FEED_FETCHES,
+                     FEED_ENTRIES, ENTRY_CATEGORIES, ERRORS, RUNS, ENTRIES_WRITTEN)
+from translation import TranslationEngine, create_backend
+from translation_cache import TranslationCache
+from text_cleaner import clean_description, truncate_text
 
-# Define cache file paths using config
-CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['cache']['directory'])
-TRANSLATION_CACHE_FILE = os.path.join(CACHE_DIR, config['cache']['translation']['file'])
-FEED_CACHE_FILE = os.path.join(CACHE_DIR, config['cache']['feed']['file'])
+REPORT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           config['reports']['directory'], config['reports']['file'])
 
-def ensure_cache_dir():
-    """Ensure cache directory exists"""
-    os.makedirs(CACHE_DIR, exist_ok=True)
+# Shared by every feed in the process; created on first use so that
+# importing this module opens no files or databases
+_translation_engine = None
+_duplicate_index = None
+_shared_lock = threading.Lock()
 
-def load_cache(cache_file):
-    """Load cache from file"""
-    try:
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Error loading cache: {e}")
-    return {}
-
-def save_cache(cache_data, cache_file):
-    """Save cache to file"""
-    try:
-        ensure_cache_dir()
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Error saving cache: {e}")
-
-def ensure_cache_files():
-    """Ensure both cache files exist with valid JSON content"""
-    ensure_cache_dir()
-    
-    # Initialize both cache files if they don't exist
-    cache_files = [TRANSLATION_CACHE_FILE, FEED_CACHE_FILE]
-    
-    for cache_file in cache_files:
-        if not os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump({}, f)
-                logger.info(f"Created cache file: {cache_file}")
-            except Exception as e:
-                logger.error(f"Error creating cache file {cache_file}: {e}")
-
-# Call this function during initialization
-ensure_cache_files()
-
-class TranslationCache:
-    def __init__(self):
-        ensure_cache_files()  # Ensure cache files exist before loading
-        self.cache = load_cache(TRANSLATION_CACHE_FILE)
-        self.max_size = config['cache']['translation']['max_size']
-        logger.info(f"Initialized translation cache with {len(self.cache)} entries")
+def get_translation_engine():
+    global _translation_engine
+    with _shared_lock:
+        if _translation_engine is None:
+            _translation_engine = TranslationEngine(create_backend(), TranslationCache())
+        return _translation_engine
 
-    def get(self, key):
-        return self.cache.get(key)
+def get_duplicate_index():
+    global _duplicate_index
+    with _shared_lock:
+        if _duplicate_index is None:
+            _duplicate_index = DuplicateIndex()
+        return _duplicate_index
 
-    def set(self, key, value):
-        self.cache[key] = value
-        if len(self.cache) > self.max_size:
-            # Remove oldest 20% of entries when cache is full
-            items = sorted(self.cache.items(), key=lambda x: x[1].get('timestamp', 0))
-            self.cache = dict(items[int(self.max_size * 0.2):])
-        self.save()
+# The engine already counts its work; expose those counters as they are
+TRANSLATION_METRICS = {
+    'requests': 'Translation requests, including cache hits',
+    'cache_hits': 'Translations served from the translation cache',
+    'coalesced': 'Translation requests that joined an identical in-flight request',
+    'backend_calls': 'Batches sent to the translation backend',
+    'texts_translated': 'Texts translated by the backend',
+    'failures': 'Texts the backend failed to translate',
+    'skipped_target_language': 'Texts already in the target language, not translated',
+    'skipped_chars': 'Characters of text already in the target language',
+    'retries': 'Backend calls retried after a failure',
+    'rejected': 'Texts not sent because the backend circuit was open',
+}
+for _stat, _help in TRANSLATION_METRICS.items():
+    registry.callback(f'rssoffice_translation_{_stat}_total', _help,
+                      lambda stat=_stat: _translation_engine.stats[stat] if _translation_engine else 0,
+                      kind='counter')
+registry.callback('rssoffice_translation_circuit_open',
+                  'Whether calls to the translation backend are paused (1) after repeated failures',
+                  lambda: int(_translation_engine.breaker.is_open) if _translation_engine else 0)
 
-    def save(self):
-        save_cache(self.cache, TRANSLATION_CACHE_FILE)
+async def translate_text_async(text, feed=None):
+    """Translate text with caching, batching and in-flight deduplication;
+    text already in the target language is returned untranslated. Returns
+    None when the backend failed or is paused."""
+    return await get_translation_engine().try_translate(text, feed)
 
-class FeedCache:
-    def __init__(self):
-        ensure_cache_files()  # Ensure cache files exist before loading
-        self.cache = load_cache(FEED_CACHE_FILE)
-        self.cache_duration = timedelta(hours=config['cache']['feed']['duration_hours'])
-        logger.info(f"Initialized feed cache with {len(self.cache)} entries")
+def entry_identity(entry):
+    """Return a stable id (GUID, else link) and a hash of the entry content"""
+    entry_id = entry.get('id') or entry.get('link', '')
+    content = '\0'.join([
+        entry.get('title', ''),
+        entry.get('summary', '') or entry.get('description', ''),
+        entry.get('published', '')
+    ])
+    content_hash = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+    return entry_id, content_hash
 
-    def get(self, url):
-        if url in self.cache:
-            cached_data = self.cache[url]
-            cached_time = datetime.fromisoformat(cached_data['timestamp'])
-            if datetime.now() - cached_time < self.cache_duration:
-                return cached_data['data']
-        return None
+def raw_description(entry):
+    """Description of a parsed feed entry, before any processing"""
+    if hasattr(entry, 'summary'):
+        return entry.summary
+    if hasattr(entry, 'description'):
+        return entry.description
+    if hasattr(entry, 'content'):
+        return entry.content[0].value if entry.content else ''
+    return ''
 
-    def set(self, url, data):
-        self.cache[url] = {
-            'timestamp': datetime.now().isoformat(),
-            'data': data
-        }
-        self.save()
-
-    def save(self):
-        save_cache(self.cache, FEED_CACHE_FILE)
-
-# Initialize caches
-translation_cache = TranslationCache()
-feed_cache = FeedCache()
+def entry_fingerprint(entry):
+    """SimHash of the raw title and description, taken before translation"""
+    return simhash(f"{entry.get('title', '')} {raw_description(entry)}")
 
-def is_recent(date_str, hours=720):
-    return DateHandler.is_recent(date_str, hours)
-
-async def translate_text_async(text):
-    """Translate text with caching"""
-    cached = translation_cache.get(text)
-    if cached:
-        return cached
-
-    try:
-        translator = GoogleTranslator(
-            source=config['translation']['source_language'],
-            target=config['translation']['target_language']
-        )
-        translated = translator.translate(text)
-        
-        translation_cache.set(text, {
-            'translation': translated,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        return translated
-    except Exception as e:
-        print(f"Translation failed: {str(e)}")
-        return text
+def duplicate_entry(entry, canonical, source_title, url):
+    """Build a near-duplicate's entry from its processed twin, reusing the
+    translation, keywords and category"""
+    entry_id, content_hash = entry_identity(entry)
+    duplicate = dict(canonical)
+    duplicate.update({
+        'id': entry_id,
+        'content_hash': content_hash,
+        'link': entry.get('link', '#'),
+        'source': source_title if source_title else url,
+        'published': entry.get('published', 'No date'),
+        'published_ts': DateHandler.parse_timestamp(entry.get('published')),
+        'duplicate_of': entry_key(canonical)
+    })
+    return duplicate
 
 async def process_entry(entry, source_title, url):
-    """Process a single feed entry"""
+    """Translate and clean a single feed entry; keywords and category are
+    filled in afterwards for the whole feed by annotate_entries()"""
+    entry_id, content_hash = entry_identity(entry)
     try:
-        translated_title = await translate_text_async(entry.title)
-        
-        # Get description from the entry
-        description = ''
-        if hasattr(entry, 'summary'):
-            description = entry.summary
-        elif hasattr(entry, 'description'):
-            description = entry.description
-        elif hasattr(entry, 'content'):
-            description = entry.content[0].value if entry.content else ''
-        
-        # Translate description if it exists
-        translated_description = ''
-        if description:
-            try:
-                translated_description = await translate_text_async(description)
-                # Clean up description (remove HTML tags if present)
-                if isinstance(translated_description, str):
-                    soup = BeautifulSoup(translated_description, 'html.parser')
-                    translated_description = soup.get_text(separator=' ', strip=True)
-                    # Truncate if too long
-                    if len(translated_description) > 300:
-                        translated_description = translated_description[:297] + '...'
-            except Exception as e:
-                print(f"Error processing description: {e}")
-                translated_description = ''
-        
-        # Extract keywords for categorization
-        keyword_extractor = KeywordExtractor.create_default()
-        text_for_keywords = f"{translated_title} {translated_description}"
-        keywords = keyword_extractor.extract_keywords(text_for_keywords)
-        
-        # Determine category
-        category = keyword_extractor.categorize_content(keywords)
+        # Strip markup and boilerplate and cut to length before
+        # translating, so only displayed text is translated and cached
+        with STAGE_SECONDS.time('clean'):
+            description = clean_description(raw_description(entry), url)
         
-        # Debug print
-        print(f"Successfully processed: {translated_title}")
-        print(f"Description length: {len(translated_description)}")
+        # Translate title and description together so they share a batch
+        with STAGE_SECONDS.time('translate'):
+            translated_title, translated_description = await asyncio.gather(
+                translate_text_async(entry.title, url),
+                translate_text_async(description, url)
+            )
+        # Without a translation the source text is shown until the entry
+        # is translated again on a later run
+        translation_pending = (
+            (translated_title is None and bool(entry.title)) or
+            (translated_description is None and bool(description))
+        )
+        if translated_title is None:
+            translated_title = entry.title
+        if translated_description is None:
+            translated_description = description
+        # Translations can run longer than their source
+        translated_description = truncate_text(translated_description or '',
+                                               config['description']['max_length'])
         
-        return {
+        processed_entry = {
+            'id': entry_id,
+            'content_hash': content_hash,
             'title': translated_title,
             'link': entry.link,
             'source': source_title if source_title else url,
             'published': entry.get('published', 'No date'),
-            'description': translated_description,
-            'keywords': keywords,
-            'category': category
+            'published_ts': DateHandler.parse_timestamp(entry.get('published')),
+            'description': translated_description
         }
+        if translation_pending:
+            processed_entry['translation_pending'] = True
+        return processed_entry
     except Exception as e:
-        print(f"Error in process_entry: {e}")
-        # Return a minimal valid entry if there's an error
+        logger.error(f"Error in process_entry: {e}")
+        ERRORS.inc(1, 'entry')
+        # Return a minimal valid entry if there's an error; without a
+        # content_hash it is processed again on the next run
         return {
+            'id': entry_id,
             'title': getattr(entry, 'title', 'No title'),
             'link': getattr(entry, 'link', '#'),
             'source': source_title if source_title else url,
             'published': entry.get('published', 'No date'),
+            'published_ts': DateHandler.parse_timestamp(entry.get('published')),
             'description': '',
             'keywords': [],
             'category': 'Other'
         }
 
+async def annotate_entries(entries):
+    """Extract keywords and categorize a batch of entries.
+
+    Keyword extraction is CPU-bound, so it runs on the process pool and
+    leaves the event loop free for fetching. Feeds processed at the same
+    time share one batch, so the pool is used even when each feed has
+    only a few new entries.
+    """
+    if not entries:
+        return entries
+    texts = [f"{entry['title']} {entry['description']}" for entry in entries]
+    with STAGE_SECONDS.time('keyword'):
+        keyword_lists = await get_keyword_batcher().extract(texts)
+    with STAGE_SECONDS.time('categorize'):
+        categories = KeywordExtractor.create_default().score_categories_many(keyword_lists)
+    for entry, keywords, (category, confidence) in zip(entries, keyword_lists, categories):
+        entry['keywords'] = keywords
+        entry['category'] = category
+        entry['category_confidence'] = round(confidence, 3)
+        ENTRY_CATEGORIES.inc(1, category)
+    return entries
+
 def load_feed_urls():
     """Load and validate feed URLs"""
     try:
         if not os.path.exists('feeds.txt'):
-            print("Error: feeds.txt file not found!")
+            logger.error("feeds.txt file not found")
             return []
             
         with open('feeds.txt', 'r', encoding='utf-8') as file:
             urls = [line.strip() for line in file if line.strip() and not line.startswith('#')]
             
         if not urls:
-            print("Warning: No valid URLs found in feeds.txt")
+            logger.warning("No valid URLs found in feeds.txt")
         else:
-            print(f"Loaded {len(urls)} URLs from feeds.txt:")
-            for url in urls:
-                print(f"  - {url}")
+            logger.info(f"Loaded {len(urls)} URLs from feeds.txt")
             
         return urls
     except Exception as e:
-        print(f"Error loading feed URLs: {e}")
+        logger.error(f"Error loading feed URLs: {e}")
         return []
 
-async def process_feed(url):
-    """Process feed with caching"""
-    feed_cache = FeedCache()
+def create_session():
+    """Create the pooled HTTP session shared by all feeds in one run"""
+    import aiohttp
+    http_config = config['http']
+    connector = aiohttp.TCPConnector(
+        limit=http_config['max_connections'],
+        limit_per_host=http_config['max_connections_per_host'],
+        ttl_dns_cache=http_config['dns_cache_seconds'],
+        keepalive_timeout=http_config['keepalive_seconds']
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=http_config['timeout_seconds']),
+        headers={'User-Agent': http_config['user_agent']}
+    )
+
+async def process_feed(url, session=None, errors=None, poll=None):
+    """Process feed with caching; failures are appended to errors.
+
+    When the scheduler polls a feed it passes a PollResult, which is filled
+    in with the response's caching hints; the scheduler has already decided
+    the feed is due, so the feed cache's own freshness check is skipped.
+    """
+    dedup_enabled = config['dedup']['enabled']
+    if session is None:
+        async with create_session() as session:
+            return await process_feed(url, session, errors, poll)
+    duplicate_index = get_duplicate_index()
+
+    feed_cache = get_feed_cache()
     
     # Try to get from cache first
-    cached_data = feed_cache.get(url)
+    cached_data = feed_cache.get(url) if poll is None else None
     if cached_data:
-        print(f"Using cached data for {url}")
+        logger.debug(f"Using cached data for {url}")
+        FEED_FETCHES.inc(1, 'fresh')
+        FEED_ENTRIES.inc(len(cached_data), 'reused')
         return cached_data
     
-    print(f"\nProcessing feed: {url}")
+    logger.debug(f"Processing feed: {url}")
+    fetched = False
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        headers = feed_cache.get_validators(url)
         
-        async with aiohttp.ClientSession() as session:
-            print(f"Fetching {url}")
-            async with session.get(url, headers=headers, timeout=30) as response:
-                if response.status != 200:
-                    print(f"HTTP error {response.status} for {url}")
-                    return []
-                
-                feed_data = await response.text()
-                feed = feedparser.parse(feed_data)
-                
-                if not feed.entries:
-                    print(f"No entries found in {url}")
-                    return []
-                
-                source_title = feed.feed.get('title', '')
-                recent_entries = feed.entries[:10]  # Get latest 10 entries
-                
-                processed_entries = []
-                for entry in recent_entries:
-                    try:
-                        processed_entry = await process_entry(entry, source_title, url)
-                        if processed_entry:
-                            processed_entries.append(processed_entry)
-                    except Exception as e:
-                        print(f"Error processing entry: {e}")
-                        continue
-                
-                # Cache the processed entries
-                feed_cache.set(url, processed_entries)
-                
-                print(f"Successfully processed {len(processed_entries)} entries from {url}")
-                logger.info(f"Successfully processed feed: {url}")
-                return processed_entries
+        fetch_start = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            if poll is not None:
+                poll.record_response(response.status, response.headers)
+            if response.status == 304:
+                logger.debug(f"Not modified: {url}")
+                STAGE_SECONDS.observe(time.perf_counter() - fetch_start, 'fetch')
+                FEED_FETCHES.inc(1, 'not_modified')
+                cached_entries = feed_cache.touch(url) or []
+                FEED_ENTRIES.inc(len(cached_entries), 'reused')
+                return cached_entries
+            
+            if response.status != 200:
+                logger.warning(f"HTTP error {response.status} for {url}")
+                FEED_FETCHES.inc(1, 'error')
+                ERRORS.inc(1, 'fetch')
+                if errors is not None:
+                    errors.append(f"{url}: HTTP {response.status}")
+                return []
+            
+            # Stream at most max_entries_per_feed items, within size and
+            # per-chunk time limits
+            max_entries = config['feeds']['max_entries_per_feed']
+            feed_data = await read_feed(response, max_entries)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_type = response.headers.get('Content-Type')
+        STAGE_SECONDS.observe(time.perf_counter() - fetch_start, 'fetch')
+        FEED_FETCHES.inc(1, 'fetched')
+        fetched = True
+        
+        # Parse off the event loop so other feeds keep downloading
+        with STAGE_SECONDS.time('parse'):
+            feed_info, recent_entries = await parse_feed_async(feed_data, max_entries, content_type)
+        source_title = feed_info['title']
+        if poll is not None:
+            poll.ttl = parse_ttl(feed_info['ttl'])
+        
+        if not recent_entries:
+            logger.debug(f"No entries found in {url}")
+            return []
+        
+        # Reuse entries we already processed; only new or changed entries
+        # go through translation, keyword extraction and categorization
+        known_entries = feed_cache.get_entries(url)
+        processed_entries = [None] * len(recent_entries)
+        pending = []
+        for index, entry in enumerate(recent_entries):
+            entry_id, content_hash = entry_identity(entry)
+            known = known_entries.get(entry_id)
+            if known and known.get('content_hash') == content_hash and not known.get('translation_pending'):
+                processed_entries[index] = known
+                if dedup_enabled and entry_id not in duplicate_index and not known.get('duplicate_of'):
+                    duplicate_index.add(entry_fingerprint(entry), entry_id, entry=known)
+            else:
+                pending.append(index)
+        
+        # Near-duplicates of stories already seen in any feed reuse that
+        # story's translation instead of being translated again
+        loop = asyncio.get_running_loop()
+        originals = []
+        duplicates = []
+        records = {}
+        for index in pending:
+            entry = recent_entries[index]
+            entry_id = entry_identity(entry)[0]
+            fingerprint = entry_fingerprint(entry)
+            record = duplicate_index.find(fingerprint, exclude=entry_id) if dedup_enabled else None
+            if record is not None and (record.entry is not None or (
+                    record.future is not None and not record.future.done()
+                    and record.future.get_loop() is loop)):
+                duplicates.append((index, record))
+            else:
+                originals.append(index)
+                if dedup_enabled:
+                    records[index] = duplicate_index.add(fingerprint, entry_id, future=loop.create_future())
+        
+        try:
+            # Process entries concurrently so their translations batch up
+            results = await asyncio.gather(
+                *(process_entry(recent_entries[index], source_title, url) for index in originals),
+                return_exceptions=True
+            )
+            for index, processed_entry in zip(originals, results):
+                if isinstance(processed_entry, Exception):
+                    logger.error(f"Error processing entry: {processed_entry}")
+                    continue
+                processed_entries[index] = processed_entry
+            await annotate_entries([
+                processed_entries[index] for index in originals
+                if processed_entries[index] and 'keywords' not in processed_entries[index]
+            ])
+        finally:
+            # Release duplicates waiting on these entries, in this feed or
+            # another; failed entries are not offered as originals
+            for index, record in records.items():
+                entry = processed_entries[index]
+                record.entry = entry if entry and entry.get('content_hash') else None
+                if not record.future.done():
+                    record.future.set_result(record.entry)
+        
+        for index, record in duplicates:
+            canonical = record.entry or await record.future
+            if canonical is not None:
+                processed_entries[index] = duplicate_entry(recent_entries[index], canonical, source_title, url)
+        
+        failed = sum(1 for index in originals
+                     if not (processed_entries[index] and processed_entries[index].get('content_hash')))
+        untranslated = sum(1 for index in originals
+                           if processed_entries[index] and processed_entries[index].get('translation_pending'))
+        processed_entries = [entry for entry in processed_entries if entry]
+        FEED_ENTRIES.inc(len(recent_entries) - len(pending), 'reused')
+        FEED_ENTRIES.inc(len(originals) - failed - untranslated, 'processed')
+        FEED_ENTRIES.inc(untranslated, 'translation_pending')
+        FEED_ENTRIES.inc(failed, 'failed')
+        FEED_ENTRIES.inc(len(duplicates), 'duplicate')
+        logger.debug(f"Reused {len(recent_entries) - len(pending)} entries, processed {len(originals)}, "
+                     f"matched {len(duplicates)} near-duplicates from {url}")
+        
+        # Cache the processed entries along with the validators for next time
+        feed_cache.set(url, processed_entries, etag=etag, last_modified=last_modified)
+        
+        logger.info(f"Successfully processed {len(processed_entries)} entries from {url}")
+        return processed_entries
                 
+    except (FeedTooLarge, asyncio.TimeoutError) as e:
+        if poll is not None:
+            poll.error = True
+        logger.warning(f"Aborted download of {url}: {str(e) or 'read timed out'}")
+        FEED_FETCHES.inc(1, 'error')
+        ERRORS.inc(1, 'fetch')
+        if errors is not None:
+            errors.append(f"{url}: {str(e) or 'read timed out'}")
+        return []
     except Exception as e:
+        if poll is not None:
+            poll.error = True
         logger.error(f"Error processing feed {url}: {e}")
+        if not fetched:
+            FEED_FETCHES.inc(1, 'error')
+        ERRORS.inc(1, 'feed')
+        if errors is not None:
+            errors.append(f"{url}: {e}")
         return []
 
+def ratio(hits, total):
+    return f"{hits / total:.1%}" if total else 'N/A'
+
 def generate_feed_report(analytics):
     """Generate a report of feed processing metrics"""
     try:
-        report_file = os.path.join(CACHE_DIR, config['reports']['feed_report'])
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
         
         # Calculate metrics
         feeds_count = analytics['feeds_processed']
         total_time = analytics.get('processing_time_seconds', 0)
         
-        with open(report_file, 'w', encoding='utf-8') as f:
+        with open(REPORT_FILE, 'w', encoding='utf-8') as f:
             f.write(f"Feed Processing Report\n")
             f.write(f"=====================\n\n")
             f.write(f"Timestamp: {analytics['timestamp']}\n")
             f.write(f"Metrics:\n")
             f.write(f"    feeds_processed: {feeds_count}\n")
             f.write(f"    total_entries: {analytics['total_entries']}\n")
+            f.write(f"    entries_written: {analytics.get('entries_written', 0)}\n")
             f.write(f"    processing_time: {total_time:.1f}s\n")
             # Add check for zero division
             if total_time > 0:
@@ -302,10 +430,37 @@ def generate_feed_report(analytics):
             else:
                 f.write(f"    feeds_per_second: N/A\n")
             
+            # Stage timings; translation is timed per entry and runs
+            # concurrently, so stage totals can exceed the wall time
+            f.write(f"\nStage Timings:\n")
+            for stage, (count, seconds) in analytics.get('stages', {}).items():
+                f.write(f"    {stage}: {seconds:.3f}s over {count} calls\n")
+            
+            # Entry outcomes
+            f.write(f"\nEntries:\n")
+            for outcome, count in analytics.get('entries', {}).items():
+                f.write(f"    {outcome}: {count}\n")
+            
             # Cache metrics
-            f.write(f"\nCache Performance:\n")
-            f.write(f"    hits: {analytics.get('cache_hits', 0)}\n")
-            f.write(f"    misses: {analytics.get('cache_misses', 0)}\n")
+            feed_cache_stats = analytics.get('feed_cache', {})
+            f.write(f"\nFeed Cache:\n")
+            for result, count in feed_cache_stats.items():
+                f.write(f"    {result}: {count}\n")
+            f.write(f"    hit_ratio: {ratio(analytics.get('cache_hits', 0), sum(feed_cache_stats.values()))}\n")
+            
+            translation_stats = analytics.get('translation', {})
+            f.write(f"\nTranslation:\n")
+            for stat, count in translation_stats.items():
+                f.write(f"    {stat}: {count}\n")
+            f.write(f"    cache_hit_ratio: "
+                    f"{ratio(translation_stats.get('cache_hits', 0), translation_stats.get('requests', 0))}\n")
+            skipped = translation_stats.get('skipped_target_language', 0)
+            f.write(f"    skipped_ratio: {ratio(skipped, skipped + translation_stats.get('requests', 0))}\n")
+            
+            if analytics.get('entries_by_category'):
+                f.write(f"\nNew Entries by Category:\n")
+                for category, count in sorted(analytics['entries_by_category'].items()):
+                    f.write(f"    {category}: {count}\n")
             
             # Errors
             if analytics.get('errors'):
@@ -318,6 +473,7 @@ def generate_feed_report(analytics):
             for metric in analytics.get('feed_metrics', []):
                 f.write(f"\n    {metric['url']}:\n")
                 f.write(f"        entries: {metric['entries_processed']}\n")
+                f.write(f"        time: {metric['seconds']:.3f}s\n")
                 if metric.get('categories'):
                     f.write(f"        categories:\n")
                     for category, count in metric['categories'].items():
@@ -327,22 +483,49 @@ def generate_feed_report(analytics):
         logger.error(f"Error generating feed report: {e}")
 
 def save_feed_entries(entries):
-    """Save feed entries to a JSON file"""
-    output_dir = 'data'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    output_file = os.path.join(output_dir, 'feed_entries.json')
-    
+    """Save feed entries to the entry store.
+
+    Only new or changed entries are written, in one transaction, so the
+    cost follows the size of the run rather than of the archive.
+    """
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
-        print(f"Saved {len(entries)} entries to {output_file}")
+        with STAGE_SECONDS.time('persist'):
+            written = get_entry_store().upsert(entries)
+        ENTRIES_WRITTEN.inc(written)
+        logger.info(f"Saved {written} new or changed entries of {len(entries)}")
+        return written
     except Exception as e:
-        print(f"Error saving feed entries: {e}")
+        logger.error(f"Error saving feed entries: {e}")
+        ERRORS.inc(1, 'persist')
+        return 0
+
+def run_analytics(changes):
+    """Fold the metrics recorded during one run into report fields"""
+    def by_label(name):
+        return {labels[0]: value for labels, value in changes.get(name, {}).items()}
+    
+    feed_cache_stats = by_label('rssoffice_feed_fetches_total')
+    return {
+        'stages': by_label('rssoffice_stage_seconds'),
+        'entries': by_label('rssoffice_feed_entries_total'),
+        'entries_by_category': by_label('rssoffice_entries_categorized_total'),
+        'feed_cache': feed_cache_stats,
+        'cache_hits': feed_cache_stats.get('fresh', 0) + feed_cache_stats.get('not_modified', 0),
+        'cache_misses': feed_cache_stats.get('fetched', 0),
+        'translation': {
+            stat: changes.get(f'rssoffice_translation_{stat}_total', {}).get((), 0)
+            for stat in TRANSLATION_METRICS
+        },
+    }
+
+async def get_feeds_async(feed_urls=None, scheduler=None):
+    """Get all feeds (from feeds.txt unless feed_urls is given).
 
-async def get_feeds_async():
-    """Get all feeds with configurable time filter"""
+    With a FeedScheduler, each feed's next poll is scheduled from what this
+    poll returned.
+    """
     start_time = datetime.now()
+    metrics_before = registry.snapshot()
     analytics = {
         'timestamp': start_time.isoformat(),
         'feeds_processed': 0,
@@ -355,65 +538,63 @@ async def get_feeds_async():
         'processing_time_seconds': 0
     }
     
-    feed_urls = load_feed_urls()
+    if feed_urls is None:
+        feed_urls = load_feed_urls()
     if not feed_urls:
-        print("No feeds to process")
+        logger.warning("No feeds to process")
         return []
     
-    # Process all feeds concurrently
-    tasks = [process_feed(url) for url in feed_urls]
-    results = await asyncio.gather(*tasks)
+    # Bound the work in flight overall and per upstream host; the host
+    # slot is taken first so a busy host does not hold global slots
+    scheduler_config = config['scheduler']
+    feed_slots = asyncio.Semaphore(scheduler_config['max_concurrent_feeds'])
+    host_slots = defaultdict(lambda: asyncio.Semaphore(scheduler_config['max_concurrent_per_host']))
+    
+    async def timed_process_feed(url, session):
+        poll = PollResult() if scheduler is not None else None
+        async with host_slots[feed_host(url)], feed_slots:
+            feed_start = time.perf_counter()
+            entries = await process_feed(url, session, analytics['errors'], poll)
+            elapsed = time.perf_counter() - feed_start
+        FEED_SECONDS.observe(elapsed)
+        if scheduler is not None:
+            scheduler.record(url, poll, entries)
+        return entries, elapsed
+    
+    # Process all feeds concurrently over one pooled session
+    async with create_session() as session:
+        tasks = [timed_process_feed(url, session) for url in feed_urls]
+        results = await asyncio.gather(*tasks)
     
     # Flatten results list and collect all entries without time filtering
     all_entries = []
-    for url, entries in zip(feed_urls, results):
+    for url, (entries, elapsed) in zip(feed_urls, results):
         all_entries.extend(entries)
         analytics['feed_metrics'].append({
             'url': url,
             'entries_processed': len(entries),
+            'seconds': elapsed,
             'categories': {
                 category: sum(1 for e in entries if e.get('category') == category)
                 for category in set(e.get('category', 'Other') for e in entries)
             }
         })
     
-    # Update analytics
+    if scheduler is not None:
+        scheduler.save()
+    # Don't leave this run's feeds to the debounce timer
+    get_feed_cache().flush()
+    
+    # Save entries, then report on what this run did
+    analytics['entries_written'] = save_feed_entries(all_entries)
+    RUNS.inc()
     analytics['total_entries'] = len(all_entries)
     analytics['feeds_processed'] = len(feed_urls)
-    
-    # Generate report and save entries
+    analytics['processing_time_seconds'] = (datetime.now() - start_time).total_seconds()
+    analytics.update(run_analytics(metrics_diff(metrics_before, registry.snapshot())))
     generate_feed_report(analytics)
-    save_feed_entries(all_entries)
     
     return all_entries
 
 def get_feeds():
     return asyncio.run(get_feeds_async())
-
-def format_date(date_str):
-    """Format date string to show only day and month"""
-    try:
-        if not date_str or date_str == 'No date':
-            return 'No date'
-            
-        # Parse the date string
-        if isinstance(date_str, str):
-            try:
-                # Try RFC 2822 format first (common in RSS feeds)
-                date = parsedate_to_datetime(date_str)
-            except:
-                try:
-                    # Try ISO format
-                    date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                except:
-                    print(f"Unparseable date format: {date_str}")
-                    return date_str
-        else:
-            return str(date_str)
-
-        # Format to "22 Nov" style
-        return date.strftime("%d %b")
-                
-    except Exception as e:
-        print(f"Error formatting date: {e}")
-        return date_str
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Bounded feed download and off-loop parsing.
+
+Bodies are streamed with a timeout per chunk and a size cap, and reading
+stops as soon as the first max_items items have arrived; the rest of the
+feed is never downloaded or parsed. Parsing runs on a worker thread, or on
+the shared process pool for large bodies, so it never blocks the event
+loop. Kept free of feed_parser imports so pool workers load it cheaply;
+feedparser itself is imported on first parse.
+"""
+import asyncio
+import re
+from concurrent.futures.process import BrokenProcessPool
+from config import config
+from workers import get_process_pool, reset_process_pool
+
+CHUNK_SIZE = 64 * 1024
+# Closing tag of an RSS item or Atom entry, with an optional prefix
+ITEM_END_RE = re.compile(rb'</(?:[\w.-]+:)?(?:item|entry)\s*>', re.IGNORECASE)
+# Long enough to hold any partial closing tag split across two chunks
+TAG_OVERLAP = 64
+# Only the fields process_feed() and process_entry() read
+ENTRY_FIELDS = ('id', 'link', 'title', 'summary', 'content', 'published')
+
+class FeedTooLarge(Exception):
+    pass
+
+def close_truncated(body):
+    """Close the document after the last kept item, so the strict parser
+    still accepts it"""
+    head = body[:4096].lower()
+    if b'<feed' in head:
+        return body + b'</feed>'
+    if b'<rdf:rdf' in head:
+        return body + b'</rdf:RDF>'
+    return body + b'</channel></rss>'
+
+def truncate_items(body, max_items):
+    """Cut body after its max_items-th item; None if it has no more"""
+    count = 0
+    for match in ITEM_END_RE.finditer(body):
+        count += 1
+        if count == max_items:
+            if not ITEM_END_RE.search(body, match.end()):
+                return None
+            return close_truncated(body[:match.end()])
+    return None
+
+async def read_feed(response, max_items, max_bytes=None, chunk_timeout=None):
+    """Stream a feed body, stopping after max_items items.
+
+    Raises FeedTooLarge once more than max_bytes arrive without reaching
+    max_items, and asyncio.TimeoutError if a chunk takes longer than
+    chunk_timeout seconds.
+    """
+    http_config = config['http']
+    if max_bytes is None:
+        max_bytes = http_config['max_body_mb'] * 1024 * 1024
+    if chunk_timeout is None:
+        chunk_timeout = http_config['read_timeout_seconds']
+
+    if response.content_length and response.content_length > max_bytes:
+        raise FeedTooLarge(f"Content-Length {response.content_length} exceeds {max_bytes} bytes")
+
+    body = bytearray()
+    count = 0
+    scan_from = 0
+    while True:
+        chunk = await asyncio.wait_for(response.content.read(CHUNK_SIZE), chunk_timeout)
+        if not chunk:
+            return bytes(body)
+        body.extend(chunk)
+
+        # Count item ends in the new data only; a match never repeats
+        # because scanning resumes at or after the last match
+        last_end = scan_from
+        for match in ITEM_END_RE.finditer(body, scan_from):
+            count += 1
+            last_end = match.end()
+            if count == max_items:
+                return close_truncated(bytes(body[:last_end]))
+        scan_from = max(len(body) - TAG_OVERLAP, last_end)
+
+        if len(body) > max_bytes:
+            raise FeedTooLarge(f"Body exceeds {max_bytes} bytes before {max_items} items")
+
+def parse_feed(body, max_items, content_type=None):
+    """Parse the first max_items entries of a feed body.
+
+    Returns (feed info, entries): the feed's title and <ttl>, and entries
+    trimmed to the fields the pipeline uses, which keeps them cheap to send
+    back from a pool worker.
+    """
+    import feedparser
+    truncated = truncate_items(body, max_items)
+    headers = {'content-type': content_type} if content_type else None
+    feed = feedparser.parse(truncated or body, response_headers=headers)
+    entries = [
+        feedparser.FeedParserDict({field: entry[field] for field in ENTRY_FIELDS if field in entry})
+        for entry in feed.entries[:max_items]
+    ]
+    feed_info = {'title': feed.feed.get('title', ''), 'ttl': feed.feed.get('ttl')}
+    return feed_info, entries
+
+async def parse_feed_async(body, max_items, content_type=None):
+    """parse_feed() off the event loop: on a thread for small bodies, on the
+    process pool from feeds.process_pool_min_kb up"""
+    loop = asyncio.get_running_loop()
+    if len(body) < config['feeds']['process_pool_min_kb'] * 1024:
+        return await loop.run_in_executor(None, parse_feed, body, max_items, content_type)
+    try:
+        return await loop.run_in_executor(get_process_pool(), parse_feed, body, max_items, content_type)
+    except BrokenProcessPool:
+        reset_process_pool()
+        return await loop.run_in_executor(None, parse_feed, body, max_items, content_type)
@@ -0,0 +1,240 @@
+"""Background feed ingestion.
+
+Runs get_feeds_async() on its own cadence and publishes the result to the
+snapshot store, so the web process only ever reads a finished snapshot.
+With scheduler.enabled each cycle fetches only the feeds that are due
+(see scheduler.py); otherwise every feed is fetched every interval_minutes.
+
+Run in-process (ingestion.mode: thread) or as a separate worker. In
+thread mode every web process starts a worker, but only the one holding
+cache/ingestion.lock runs; the others wait to take over if it exits, so
+a server with several worker processes still polls each feed once:
+
+    python -m ingestion           # loop forever
+    python -m ingestion --once    # run a single cycle and exit
+    python -m ingestion --metrics-port 9108   # also serve /metrics
+    python -m ingestion --workers 4   # shard feeds across 4 processes
+
+With --workers, feeds are handed out through the leased queue in
+work_queue.py; more workers, on this or other hosts sharing the data
+directory, can join the same queue with --join.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from config import config
+from entry_store import get_entry_store
+from feed_cache import CACHE_DIR, cache_file_lock
+from logger import logger
+from metrics import serve_metrics
+from scheduler import FeedScheduler
+from work_queue import LeasedFeedQueue
+from snapshot import snapshot_store
+
+# cache_file_lock() adds the .lock suffix
+INGESTION_LOCK = os.path.join(CACHE_DIR, 'ingestion')
+
+def compact_if_due():
+    """Run retention and compaction every feeds.compaction_interval_hours"""
+    store = get_entry_store()
+    interval = config['feeds']['compaction_interval_hours'] * 3600
+    if time.time() - store.compacted_at() < interval:
+        return
+    try:
+        store.compact()
+    except Exception as e:
+        logger.error(f"Entry store compaction failed: {e}")
+
+def run_cycle(feed_urls=None, scheduler=None, publish=True):
+    """Fetch feeds once (all of feeds.txt by default) and publish the
+    resulting snapshot, unless the cycle changed no entries"""
+    # Imported here so the web process can import this module (to start
+    # the worker thread) without loading the ingestion stack up front
+    import feed_parser
+    try:
+        asyncio.run(feed_parser.get_feeds_async(feed_urls, scheduler))
+    except Exception as e:
+        logger.error(f"Ingestion cycle failed: {e}")
+        return None
+    compact_if_due()
+    if not publish:
+        return None
+    return snapshot_store.refresh()
+
+class IngestionWorker(threading.Thread):
+    """Daemon thread that refreshes feeds as they fall due, or every
+    interval_minutes when the scheduler is disabled"""
+
+    def __init__(self, interval_minutes=None, scheduled=None, scheduler=None, publish=True,
+                 lock_file=None):
+        super().__init__(name='ingestion-worker', daemon=True)
+        if interval_minutes is None:
+            interval_minutes = config['ingestion']['interval_minutes']
+        if scheduled is None:
+            scheduled = config['scheduler']['enabled']
+        self.interval = interval_minutes * 60
+        if scheduler is None and scheduled:
+            scheduler = FeedScheduler()
+        self.scheduler = scheduler
+        # Shard processes only write the entry store; the web process
+        # picks up new generations from there
+        self.publish = publish
+        # Held while running, so one process at a time ingests
+        self.lock_file = lock_file
+        self._feeds_mtime = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        if self.lock_file is None:
+            self._run()
+            return
+        logger.info(f"Ingestion worker waiting for {self.lock_file}.lock")
+        with cache_file_lock(self.lock_file):
+            if not self._stop_event.is_set():
+                self._run()
+
+    def _run(self):
+        if self.scheduler is None:
+            logger.info(f"Ingestion worker started (interval {self.interval}s)")
+        else:
+            logger.info("Ingestion worker started (scheduled polling)")
+        while not self._stop_event.is_set():
+            if self.scheduler is None:
+                run_cycle(publish=self.publish)
+                self._stop_event.wait(self.interval)
+            else:
+                self._stop_event.wait(self.run_scheduled())
+        logger.info("Ingestion worker stopped")
+
+    def run_scheduled(self):
+        """Fetch the feeds that are due; returns seconds to sleep"""
+        check_interval = config['scheduler']['feeds_check_seconds']
+        self.sync_feeds()
+        due = self.scheduler.pop_due()
+        if due:
+            try:
+                run_cycle(due, self.scheduler, self.publish)
+            finally:
+                # A failed cycle leaves feeds out of the schedule; they
+                # would not be polled again until a restart
+                lost = self.scheduler.requeue_unrecorded()
+                if lost:
+                    logger.warning(f"Rescheduled {len(lost)} feeds the cycle did not finish")
+                    self.scheduler.save()
+        wait = self.scheduler.seconds_until_next()
+        return check_interval if wait is None else min(wait, check_interval)
+
+    def sync_feeds(self):
+        """Pick up feeds.txt again whenever it changes"""
+        try:
+            mtime = os.stat('feeds.txt').st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._feeds_mtime:
+            self._feeds_mtime = mtime
+            import feed_parser
+            self.scheduler.sync(feed_parser.load_feed_urls())
+
+    def stop(self):
+        self._stop_event.set()
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_background_worker():
+    """Start the in-process worker once per process; it runs in only one
+    process at a time"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = IngestionWorker(lock_file=INGESTION_LOCK)
+            _worker.start()
+        return _worker
+
+def run_shard(worker_count=1):
+    """Body of one sharded worker process: take due feeds from the
+    shared leased queue until interrupted"""
+    # Share the cores between the workers' keyword/parse process pools
+    if not config['workers']['processes']:
+        config['workers']['processes'] = max(1, (os.cpu_count() or 1) // worker_count)
+    # Each shard has its own token bucket and circuit breaker; share the
+    # backend's rate between them
+    governor = config['translation']['governor']
+    governor['rate_per_second'] /= worker_count
+    governor['burst'] = max(1, governor['burst'] // worker_count)
+    queue = LeasedFeedQueue()
+    worker = IngestionWorker(scheduler=queue, publish=False)
+    logger.info(f"Ingestion shard {queue.owner} started")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.release()
+        logger.info(f"Ingestion shard {queue.owner} stopped")
+
+def run_shards(worker_count):
+    """Start worker_count shard processes and restart any that die"""
+    # Spawn rather than fork: the parent's threads and SQLite handles
+    # must not be inherited
+    context = multiprocessing.get_context('spawn')
+
+    def start():
+        process = context.Process(target=run_shard, args=(worker_count,), name='ingestion-shard')
+        process.start()
+        return process
+
+    processes = [start() for _ in range(worker_count)]
+    try:
+        while True:
+            for index, process in enumerate(processes):
+                process.join(timeout=1 / worker_count)
+                if not process.is_alive():
+                    logger.error(f"Ingestion shard {process.pid} exited ({process.exitcode}); restarting")
+                    processes[index] = start()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the feed ingestion worker')
+    parser.add_argument('--once', action='store_true', help='run a single cycle and exit')
+    parser.add_argument('--interval', type=float,
+                        help='fetch every feed every this many minutes instead of scheduling')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on this port')
+    parser.add_argument('--workers', type=int, help='shard feeds across this many processes')
+    parser.add_argument('--join', action='store_true',
+                        help='run a single shard worker in this process, e.g. on another host')
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    if args.once:
+        run_cycle()
+        return
+
+    if args.join:
+        run_shard()
+        return
+
+    if args.workers:
+        run_shards(args.workers)
+        return
+
+    worker = IngestionWorker(interval_minutes=args.interval,
+                             scheduled=False if args.interval else None)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(timeout=1)
+    except KeyboardInterrupt:
+        worker.stop()
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,26 @@
-import yake
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from config import config
+from category_matcher import get_category_matcher
+from logger import logger
+from workers import get_process_pool, pool_size, reset_process_pool
 
 class KeywordExtractor:
-    def __init__(self):
+    def __init__(self, max_ngram_size=None, num_keywords=None):
+        import yake  # heavy (pulls in numpy and networkx); only ingestion needs it
         kw_config = config['keywords']
         self.kw_extractor = yake.KeywordExtractor(
             lan=config['translation']['target_language'],
-            n=kw_config['max_ngram_size'],
+            n=max_ngram_size or kw_config['max_ngram_size'],
             dedupLim=kw_config['deduplication']['threshold'],
             dedupFunc=kw_config['deduplication']['function'],
             windowsSize=kw_config['window_size'],
-            top=kw_config['num_keywords']
+            top=num_keywords or kw_config['num_keywords']
         )
         
-        # Load category keywords from config
-        self.CATEGORY_KEYWORDS = {}
-        self.CATEGORY_WEIGHTS = {}
-        
-        for category, data in kw_config['categories'].items():
-            self.CATEGORY_KEYWORDS[category] = data['terms']
-            self.CATEGORY_WEIGHTS[category] = data.get('weight', 1.0)
-        
-        # Load scoring config
-        self.EXACT_MATCH_SCORE = kw_config['scoring']['exact_match']
-        self.PARTIAL_MATCH_SCORE = kw_config['scoring']['partial_match']
-        
-        # Load fallback config
-        self.fallback_config = kw_config['fallback']
+        # Category matcher compiled once from config and shared
+        self.category_matcher = get_category_matcher()
     
     def extract_keywords(self, text):
         try:
@@ -35,13 +29,17 @@ class KeywordExtractor:
             # Return only the keywords (not their scores)
             return [keyword[0] for keyword in keywords]
         except Exception as e:
-            print(f"Error extracting keywords: {e}")
+            # Runs in pool workers, whose stdout goes nowhere
+            logger.error(f"Error extracting keywords: {e}")
             return []
     
+    def extract_keywords_batch(self, texts):
+        return [self.extract_keywords(text) for text in texts]
+
     @classmethod
     def create_default(cls):
-        """Factory method for creating a default instance"""
-        return cls()
+        """Shared default instance, built once per process"""
+        return get_keyword_extractor()
     
     @classmethod
     def create_custom(cls, max_ngram_size=3, num_keywords=8):
@@ -49,42 +47,128 @@ class KeywordExtractor:
         return cls(max_ngram_size=max_ngram_size, num_keywords=num_keywords) 
 
     def categorize_content(self, keywords):
-        """Determine the most relevant category based on keywords and content"""
-        category_scores = {category: 0 for category in self.CATEGORY_KEYWORDS}
-        
-        # Convert keywords to lowercase for case-insensitive matching
-        keywords = [kw.lower() for kw in keywords]
-        
-        # Score each category with weighted matching
-        for keyword in keywords:
-            for category, category_keywords in self.CATEGORY_KEYWORDS.items():
-                # Exact match gets higher score
-                if keyword in category_keywords:
-                    category_scores[category] += self.EXACT_MATCH_SCORE
-                # Partial match gets lower score
-                elif any(cat_keyword in keyword for cat_keyword in category_keywords):
-                    category_scores[category] += self.PARTIAL_MATCH_SCORE
-                    
-        # Get category with highest score
-        max_score = max(category_scores.values())
-        if max_score > 0:
-            # If there's a tie, return the category with more exact matches
-            max_categories = [
-                category for category, score in category_scores.items() 
-                if score == max_score
-            ]
-            if len(max_categories) > 1:
-                # Count exact matches for tied categories
-                exact_matches = {
-                    category: sum(1 for kw in keywords if kw in self.CATEGORY_KEYWORDS[category])
-                    for category in max_categories
-                }
-                return max(exact_matches.items(), key=lambda x: x[1])[0]
-            return max_categories[0]
-            
-        # Default to 'Events' for time-related content
-        if any(time_word in ' '.join(keywords).lower() 
-               for time_word in ['week', 'weekend', 'upcoming', 'schedule', 'today', 'tomorrow']):
-            return 'Events'
-            
-        return 'Other' 
\ No newline at end of file
+        """Determine the most relevant category based on keywords"""
+        category, _ = self.category_matcher.categorize(keywords)
+        return category
+
+    def score_categories(self, keywords):
+        """Return (category, confidence) for the keywords"""
+        return self.category_matcher.categorize(keywords)
+
+    def score_categories_many(self, keyword_lists):
+        """Score many entries' keywords at once, preserving order"""
+        return self.category_matcher.categorize_many(keyword_lists)
+
+@lru_cache(maxsize=1)
+def get_keyword_extractor():
+    return KeywordExtractor()
+
+def _extract_chunk(texts):
+    # Runs in a pool worker, which keeps its own long-lived extractor
+    return get_keyword_extractor().extract_keywords_batch(texts)
+
+def _chunks(texts):
+    size = max(1, -(-len(texts) // pool_size()))
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+def extract_keywords_many(texts):
+    """Extract keywords for many texts across the process pool, in order"""
+    texts = list(texts)
+    if len(texts) < config['workers']['min_batch']:
+        return get_keyword_extractor().extract_keywords_batch(texts)
+    try:
+        results = get_process_pool().map(_extract_chunk, _chunks(texts))
+        return [keywords for chunk in results for keywords in chunk]
+    except BrokenProcessPool:
+        reset_process_pool()
+        return get_keyword_extractor().extract_keywords_batch(texts)
+
+async def extract_keywords_many_async(texts):
+    """Like extract_keywords_many(), without blocking the event loop"""
+    texts = list(texts)
+    if not texts:
+        return []
+    loop = asyncio.get_running_loop()
+    if len(texts) < config['workers']['min_batch']:
+        return await loop.run_in_executor(None, _extract_chunk, texts)
+    try:
+        pool = get_process_pool()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, _extract_chunk, chunk) for chunk in _chunks(texts))
+        )
+    except BrokenProcessPool:
+        reset_process_pool()
+        return await loop.run_in_executor(None, _extract_chunk, texts)
+    return [keywords for chunk in results for keywords in chunk]
+
+class KeywordBatcher:
+    """Gathers the texts of concurrently processed feeds into one batch.
+
+    Each feed only has a few new entries per poll, fewer than it takes to
+    make the process pool worthwhile. extract() queues a feed's texts and
+    the queue is flushed to extract_keywords_many_async() once max_batch
+    texts are waiting or batch_delay_ms has passed, so the pool gets the
+    whole run's work at once.
+    """
+
+    def __init__(self, max_batch=None, batch_delay_ms=None):
+        workers_config = config['workers']
+        self.max_batch = max_batch or workers_config['max_batch']
+        self.batch_delay = (batch_delay_ms if batch_delay_ms is not None
+                            else workers_config['batch_delay_ms']) / 1000
+        self._loop = None
+
+    def _bind_loop(self):
+        # Queued work belongs to the loop it was queued on
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+            self._tasks = set()
+        return loop
+
+    async def extract(self, texts):
+        """Keywords for each of texts, in order"""
+        texts = list(texts)
+        if not texts:
+            return []
+        loop = self._bind_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        if sum(len(queued) for queued, _ in self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            results = await extract_keywords_many_async(
+                [text for texts, _ in batch for text in texts]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        start = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(results[start:start + len(texts)])
+            start += len(texts)
+
+@lru_cache(maxsize=1)
+def get_keyword_batcher():
+    return KeywordBatcher()
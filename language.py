@@ -0,0 +1,111 @@
+"""Fast local language detection for translation skipping.
+
+Counts common function words of each supported language, plus words with
+Polish-only letters, and picks the clear winner. This is cheap enough to
+run on every title and description before translation. Short texts
+(titles) often have no clear winner; for those the feed's language,
+learned from its earlier confident detections, is used instead.
+"""
+import re
+import threading
+from collections import Counter
+from config import config
+
+STOPWORDS = {
+    'en': """the of and to in is that for on with as was are by at from it this be has have
+             an will its not but or were been which their after over about into than who
+             would more said they can also new says""",
+    'pl': """i w na z się że do nie to jest o jak po od za przez dla ale co jego już tak
+             oraz są przy był była było może także czy tym ich jako które który która tego
+             jej pod nad przed bez między został została będzie ze we""",
+    'de': """der die das und ist nicht ein eine zu den von mit sich des auf für im dem auch
+             es wird sind bei nach aus wie oder werden hat""",
+    'fr': """le la les et est des une un du en que pour dans qui pas sur au par avec ce
+             sont plus ont été aux mais""",
+    'es': """el la los las y es del que en un una por con para se su al lo como más pero
+             sus fue ha""",
+    'it': """il la le e è di che per un una del della con non si sono al alla gli dei
+             nel come anche più""",
+}
+STOPWORDS = {language: frozenset(words.split()) for language, words in STOPWORDS.items()}
+# Letters that only Polish uses among the languages above; ó is shared
+POLISH_LETTERS = frozenset('ąćęłńśźż')
+UKRAINIAN_LETTERS = frozenset('іїєґ')
+WORD_RE = re.compile(r"[^\W\d_]+")
+CYRILLIC_RE = re.compile(r'[Ѐ-ӿ]')
+
+# A decision needs this many matching words and a lead of this factor
+# over the runner-up
+MIN_HITS = 2
+MIN_LEAD = 2.0
+
+def detect_language(text):
+    """ISO 639-1 code of text, or None when the text gives no clear answer"""
+    if not text:
+        return None
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    cyrillic = len(CYRILLIC_RE.findall(text))
+    if cyrillic > len(text) // 4:
+        return 'uk' if UKRAINIAN_LETTERS.intersection(text.lower()) else 'ru'
+
+    scores = Counter()
+    for word in words:
+        for language, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                scores[language] += 1
+        if POLISH_LETTERS.intersection(word):
+            scores['pl'] += 1
+    ranked = scores.most_common(2)
+    if not ranked or ranked[0][1] < MIN_HITS:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < ranked[1][1] * MIN_LEAD:
+        return None
+    return ranked[0][0]
+
+class LanguageMemo:
+    """Per-feed tally of confidently detected languages.
+
+    A feed's language is known once it has min_samples detections and one
+    language has at least min_share of them. Counts are halved when they
+    reach max_samples, so a feed that switches language is relearned.
+    """
+
+    def __init__(self, min_samples=None, min_share=None, max_samples=200):
+        language_config = config['translation']['language_detection']
+        self.min_samples = min_samples or language_config['min_samples']
+        self.min_share = min_share or language_config['min_share']
+        self.max_samples = max_samples
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, feed, language):
+        with self._lock:
+            counts = self._counts.setdefault(feed, Counter())
+            counts[language] += 1
+            if sum(counts.values()) >= self.max_samples:
+                # Unary + drops the counts halved to zero
+                self._counts[feed] = +Counter({key: count // 2 for key, count in counts.items()})
+
+    def language(self, feed):
+        """The feed's learned language, or None"""
+        with self._lock:
+            counts = self._counts.get(feed)
+            if not counts:
+                return None
+            total = sum(counts.values())
+            language, count = counts.most_common(1)[0]
+        if total >= self.min_samples and count >= total * self.min_share:
+            return language
+        return None
+
+    def detect(self, text, feed=None):
+        """Language of text, falling back to the feed's learned language"""
+        language = detect_language(text)
+        if feed is None:
+            return language
+        if language is not None:
+            self.record(feed, language)
+            return language
+        return self.language(feed)
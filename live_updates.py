@@ -0,0 +1,150 @@
+"""Server-Sent Events stream of new entries.
+
+A small aiohttp server, separate from the Flask app, so thousands of idle
+dashboard connections cost a coroutine each instead of a worker thread.
+One poller checks the entry store's generation every refresh_seconds; when
+ingestion writes a new generation it loads the new or changed entries once
+and every connected client receives the same pre-encoded event.
+
+    python -m live_updates        # serves /api/live on live_updates.port
+
+Clients pass the generation they already show (?since=, or Last-Event-ID
+on reconnect) and get every later generation. A client too far behind to
+catch up from history, or a generation with more than max_entries
+changes, gets a `reload` event instead.
+"""
+import asyncio
+import json
+from collections import deque
+from aiohttp import web
+from config import config
+from entry_store import get_entry_store, public_entry
+from logger import logger
+
+class Broadcaster:
+    """Latest generations as encoded SSE events, plus a wake-up signal"""
+
+    def __init__(self, entry_store=None, history=None, max_entries=None):
+        live_config = config['live_updates']
+        self.entry_store = entry_store or get_entry_store()
+        self.max_entries = max_entries or live_config['max_entries']
+        self.refresh_interval = config['ingestion']['refresh_seconds']
+        self.generation = self.entry_store.generation()
+        # (from generation, to generation, encoded event), oldest first
+        self._events = deque(maxlen=history or live_config['history'])
+        self._changed = asyncio.Event()
+
+    async def run(self):
+        """Poll the entry store until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                generation = await loop.run_in_executor(None, self.entry_store.generation)
+                if generation != self.generation:
+                    await self._publish(loop, generation)
+            except Exception as e:
+                logger.error(f"Live updates: error reading entry store: {e}")
+
+    async def _publish(self, loop, generation):
+        entries = await loop.run_in_executor(
+            None, self.entry_store.entries_since, self.generation, self.max_entries + 1
+        )
+        if len(entries) > self.max_entries:
+            event = encode_event('reload', {'generation': generation}, generation)
+        else:
+            event = encode_event('entries', {
+                'generation': generation,
+                'entries': [public_entry(entry) for entry in entries],
+            }, generation)
+        self._events.append((self.generation, generation, event))
+        self.generation = generation
+        # Wake every waiting client, then arm a fresh event for the next one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def events_after(self, generation):
+        """(generation, encoded event) pairs a client at generation has not
+        seen, or None if history no longer reaches back that far.
+
+        The poller can see several generations at once, so an event may
+        also repeat entries the client has; clients key entries by id.
+        """
+        if generation >= self.generation:
+            return []
+        if not self._events or generation < self._events[0][0]:
+            return None
+        return [(to_generation, event) for _, to_generation, event in self._events
+                if to_generation > generation]
+
+    async def wait(self, timeout):
+        """Wait for the next generation; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+def encode_event(name, data, event_id):
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {name}\ndata: {payload}\n\n".encode('utf-8')
+
+def client_generation(request):
+    value = request.headers.get('Last-Event-ID') or request.query.get('since')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+async def live(request):
+    broadcaster = request.app['broadcaster']
+    live_config = config['live_updates']
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # let nginx pass events straight through
+        'Access-Control-Allow-Origin': live_config['allow_origin'],
+    })
+    await response.prepare(request)
+
+    generation = client_generation(request)
+    if generation is None:
+        generation = broadcaster.generation
+    await response.write(f"retry: {live_config['retry_ms']}\n\n".encode('utf-8'))
+    try:
+        while True:
+            events = broadcaster.events_after(generation)
+            if events is None:
+                await response.write(encode_event('reload', {'generation': broadcaster.generation},
+                                                  broadcaster.generation))
+                generation = broadcaster.generation
+            elif events:
+                for generation, event in events:
+                    await response.write(event)
+            elif not await broadcaster.wait(live_config['heartbeat_seconds']):
+                # Keeps proxies from closing an idle connection
+                await response.write(b": ping\n\n")
+    except ConnectionResetError:
+        pass
+    return response
+
+async def start_broadcaster(app):
+    app['broadcaster'] = Broadcaster()
+    app['broadcaster_task'] = asyncio.create_task(app['broadcaster'].run())
+
+async def stop_broadcaster(app):
+    app['broadcaster_task'].cancel()
+
+def create_app():
+    app = web.Application()
+    app.router.add_get('/api/live', live)
+    app.on_startup.append(start_broadcaster)
+    app.on_cleanup.append(stop_broadcaster)
+    return app
+
+def main():
+    live_config = config['live_updates']
+    web.run_app(create_app(), host=live_config['host'], port=live_config['port'])
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,17 @@ def setup_logger():
     log_config = config['logging']
     
     logger = logging.getLogger('feed_parser')
+    if logger.handlers:
+        # Already configured, e.g. the module was imported under another name
+        return logger
     logger.setLevel(log_config['level'])
     
+    # delay: the log file is only opened when something is logged
     handler = RotatingFileHandler(
         log_config['file'],
         maxBytes=log_config['max_size_mb'] * 1024 * 1024,
-        backupCount=log_config['backup_count']
+        backupCount=log_config['backup_count'],
+        delay=True
     )
     
     formatter = logging.Formatter(log_config['format'])
@@ -0,0 +1,235 @@
+"""In-process pipeline metrics in Prometheus text format.
+
+Counters and histograms are plain dicts keyed by label values, updated
+under a lock; observing a value costs a bisect and two additions, cheap
+enough to leave on in production. Served by /metrics in app.py and by
+`python -m ingestion --metrics-port` when ingestion runs on its own.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers a cache lookup up to a slow feed download
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        for labels, value in sorted(self.snapshot().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Histogram:
+    """Bucketed distribution of observed values, optionally split by labels"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def snapshot(self):
+        """labels -> (count, sum)"""
+        with self._lock:
+            return {labels: (sum(counts[:-1]), counts[-1]) for labels, counts in self._values.items()}
+
+    def samples(self):
+        with self._lock:
+            values = {labels: list(counts) for labels, counts in self._values.items()}
+        for labels, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, labels, ('le', bound)), cumulative)
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), round(counts[-1], 6)
+
+class CallbackMetric:
+    """Metric read from existing state at scrape time; callback returns
+    a number, or a dict of label values to numbers"""
+
+    def __init__(self, name, help, callback, kind='gauge', labelnames=()):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def snapshot(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            return {labels if isinstance(labels, tuple) else (labels,): v for labels, v in value.items()}
+        return {(): value}
+
+    def samples(self):
+        for labels, value in sorted(self.snapshot().items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # Modules may be re-imported (e.g. by the debug reloader); keep
+        # the first registration so values are not split across objects
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, callback, kind='gauge', labelnames=()):
+        # Callbacks are bound to live objects, so the latest one wins
+        metric = CallbackMetric(name, help, callback, kind, labelnames)
+        self._metrics[name] = metric
+        return metric
+
+    def snapshot(self):
+        """name -> {labels: value or (count, sum)}, for computing the
+        difference over one ingestion run"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                continue
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+def diff(before, after):
+    """Per-label change between two Registry.snapshot() results"""
+    changes = {}
+    for name, values in after.items():
+        previous = before.get(name, {})
+        changed = {}
+        for labels, value in values.items():
+            old = previous.get(labels)
+            if isinstance(value, tuple):
+                old = old or (0, 0)
+                delta = (value[0] - old[0], value[1] - old[1])
+                if delta[0]:
+                    changed[labels] = delta
+            else:
+                delta = value - (old or 0)
+                if delta:
+                    changed[labels] = delta
+        changes[name] = changed
+    return changes
+
+registry = Registry()
+
+def serve_metrics(port, host='0.0.0.0'):
+    """Serve /metrics from a daemon thread, for processes without Flask"""
+    # Only the standalone ingestion worker needs an HTTP server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+# Pipeline metrics, updated by feed_parser.py
+STAGE_SECONDS = registry.histogram(
+    'rssoffice_stage_seconds',
+    'Time spent per pipeline stage (fetch and parse per feed, clean and translate per entry, '
+    'keyword/categorize per feed batch, persist per run)',
+    ['stage']
+)
+FEED_SECONDS = registry.histogram(
+    'rssoffice_feed_seconds', 'Total time to process one feed'
+)
+FEED_FETCHES = registry.counter(
+    'rssoffice_feed_fetches_total',
+    'Feed lookups by result: fresh (feed cache hit), not_modified (304), fetched, error',
+    ['result']
+)
+FEED_ENTRIES = registry.counter(
+    'rssoffice_feed_entries_total',
+    'Feed entries by outcome: reused, processed, translation_pending, duplicate, failed',
+    ['outcome']
+)
+ENTRY_CATEGORIES = registry.counter(
+    'rssoffice_entries_categorized_total', 'Newly processed entries by category', ['category']
+)
+ERRORS = registry.counter(
+    'rssoffice_errors_total', 'Pipeline errors by stage', ['stage']
+)
+RUNS = registry.counter('rssoffice_ingestion_runs_total', 'Completed ingestion runs')
+ENTRIES_WRITTEN = registry.counter(
+    'rssoffice_entries_written_total', 'Entries inserted or updated in the entry store'
+)
@@ -0,0 +1,52 @@
+import gzip
+import hashlib
+import threading
+import time
+from config import config
+
+class RenderedPage:
+    """Rendered HTML plus its gzip encoding and strong ETags"""
+    __slots__ = ('body', 'gzip_body', 'etag', 'gzip_etag')
+
+    def __init__(self, body, gzip_level):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=gzip_level)
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        # Each encoding is its own representation, so it gets its own tag
+        self.gzip_etag = f"{self.etag}-gz"
+
+class PageCache:
+    """Rendered pages keyed by ingestion generation.
+
+    All pages of one generation live in a single dict that is swapped out
+    wholesale when a new snapshot is published. Age badges and time
+    windows move with the clock, so pages are also re-rendered every
+    max_age_seconds.
+    """
+
+    def __init__(self, max_age_seconds=None, gzip_level=None):
+        cache_config = config['page_cache']
+        self.max_age = max_age_seconds or cache_config['max_age_seconds']
+        self.gzip_level = gzip_level or cache_config['gzip_level']
+        self._state = (None, None, {})
+        self._lock = threading.Lock()
+
+    def get_or_render(self, generation, key, render):
+        """Return the cached page for key, rendering it if needed"""
+        bucket = int(time.time() // self.max_age)
+        state = self._state
+        if state[0] != generation or state[1] != bucket:
+            with self._lock:
+                state = self._state
+                if state[0] != generation or state[1] != bucket:
+                    state = (generation, bucket, {})
+                    self._state = state
+        pages = state[2]
+        page = pages.get(key)
+        if page is None:
+            page = RenderedPage(render().encode('utf-8'), self.gzip_level)
+            pages[key] = page
+        return page
+
+    def clear(self):
+        self._state = (None, None, {})
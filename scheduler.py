@@ -0,0 +1,236 @@
+"""Adaptive per-feed polling.
+
+Each feed is polled at an interval learned from the gaps between its
+entries' publish times, never sooner than the server asks (Cache-Control
+max-age, the RSS <ttl>, Retry-After), with exponential backoff on errors
+and random jitter so feeds do not fall into lockstep. A heap keyed by due
+time hands out the feeds to fetch next; the state survives restarts in
+cache/feed_schedule.json.
+"""
+import heapq
+import json
+import os
+import random
+import re
+import statistics
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from config import config
+from logger import logger
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['cache']['directory'])
+SCHEDULE_FILE = os.path.join(CACHE_DIR, config['scheduler']['file'])
+MAX_AGE_RE = re.compile(r'(?:^|,)\s*(?:s-)?max-age\s*=\s*"?(\d+)', re.IGNORECASE)
+# Gaps between this many most recent entries set the publish rate
+RATE_SAMPLE = 10
+
+def feed_host(url):
+    return (urlparse(url).hostname or '').lower()
+
+def parse_max_age(header):
+    """Seconds from a Cache-Control header, or None"""
+    if not header:
+        return None
+    if 'no-cache' in header.lower() or 'no-store' in header.lower():
+        return 0
+    match = MAX_AGE_RE.search(header)
+    return int(match.group(1)) if match else None
+
+def parse_retry_after(header, now=None):
+    """Seconds to wait from a Retry-After header (delta or HTTP date)"""
+    if not header:
+        return None
+    header = header.strip()
+    if header.isdigit():
+        return int(header)
+    try:
+        retry_at = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0, retry_at - (now if now is not None else time.time()))
+
+def parse_ttl(value):
+    """Seconds from an RSS <ttl> (minutes), or None"""
+    try:
+        return int(str(value).strip()) * 60
+    except (TypeError, ValueError):
+        return None
+
+class PollResult:
+    """What one poll of a feed told us; filled in by process_feed()"""
+    __slots__ = ('status', 'max_age', 'retry_after', 'ttl', 'error')
+
+    def __init__(self):
+        self.status = None
+        self.max_age = None
+        self.retry_after = None
+        self.ttl = None
+        self.error = False
+
+    def record_response(self, status, headers):
+        self.status = status
+        self.max_age = parse_max_age(headers.get('Cache-Control'))
+        self.retry_after = parse_retry_after(headers.get('Retry-After'))
+
+    @property
+    def failed(self):
+        return self.error or self.status is None or self.status not in (200, 304)
+
+def failed_poll():
+    """PollResult of a poll that never got a response"""
+    result = PollResult()
+    result.error = True
+    return result
+
+class PollPolicy:
+    """Turns a feed's entries and poll result into the next poll interval"""
+
+    def __init__(self, scheduler_config=None):
+        scheduler_config = scheduler_config or config['scheduler']
+        self.min_interval = scheduler_config['min_interval_minutes'] * 60
+        self.max_interval = scheduler_config['max_interval_minutes'] * 60
+        self.default_interval = scheduler_config['default_interval_minutes'] * 60
+        self.rate_factor = scheduler_config['rate_factor']
+        self.jitter = scheduler_config['jitter']
+        self.max_backoff = scheduler_config['error_backoff_max_minutes'] * 60
+
+    def learned_interval(self, timestamps):
+        """A fraction of the typical gap between recent entries"""
+        timestamps = sorted({ts for ts in timestamps if ts}, reverse=True)[:RATE_SAMPLE + 1]
+        if len(timestamps) < 2:
+            return self.default_interval
+        gap = statistics.median(a - b for a, b in zip(timestamps, timestamps[1:]))
+        return gap * self.rate_factor
+
+    def next_interval(self, result, timestamps, failures=0):
+        """Seconds until the next poll, before jitter"""
+        if result.failed:
+            if result.retry_after is not None:
+                return min(max(result.retry_after, self.min_interval), self.max_backoff)
+            return min(self.default_interval * 2 ** failures, self.max_backoff)
+        interval = self.learned_interval(timestamps)
+        # Never poll sooner than the server says the content stays fresh
+        hints = [hint for hint in (result.max_age, result.ttl, result.retry_after) if hint]
+        if hints:
+            interval = max(interval, max(hints))
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def with_jitter(self, interval):
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+class FeedState:
+    __slots__ = ('url', 'next_due', 'interval', 'failures', 'last_polled')
+
+    def __init__(self, url, next_due=0, interval=None, failures=0, last_polled=None):
+        self.url = url
+        self.next_due = next_due
+        self.interval = interval
+        self.failures = failures
+        self.last_polled = last_polled
+
+    def to_dict(self):
+        return {'next_due': self.next_due, 'interval': self.interval,
+                'failures': self.failures, 'last_polled': self.last_polled}
+
+class FeedScheduler:
+    """Priority queue of feeds ordered by when they are next due.
+
+    The heap may hold stale (due, url) pairs after a feed is rescheduled
+    or removed; they are skipped when popped.
+    """
+
+    def __init__(self, schedule_file=SCHEDULE_FILE, policy=None):
+        self.schedule_file = schedule_file
+        self.policy = policy or PollPolicy()
+        self._states = {}
+        self._heap = []
+        # Popped by pop_due() and not yet recorded
+        self._unrecorded = set()
+        self._load()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _push(self, state):
+        heapq.heappush(self._heap, (state.next_due, state.url))
+
+    def sync(self, urls):
+        """Track exactly these feeds; new ones are due immediately"""
+        urls = list(dict.fromkeys(urls))
+        for url in set(self._states) - set(urls):
+            del self._states[url]
+        for url in urls:
+            if url not in self._states:
+                state = FeedState(url, next_due=time.time())
+                self._states[url] = state
+                self._push(state)
+
+    def pop_due(self, now=None):
+        """Remove and return the URLs due by now, most overdue first"""
+        now = now if now is not None else time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, url = heapq.heappop(self._heap)
+            state = self._states.get(url)
+            if state is not None and state.next_due == next_due:
+                due.append(url)
+        self._unrecorded.update(due)
+        return due
+
+    def seconds_until_next(self, now=None):
+        """Time to sleep before the next feed is due"""
+        now = now if now is not None else time.time()
+        while self._heap:
+            next_due, url = self._heap[0]
+            state = self._states.get(url)
+            if state is not None and state.next_due == next_due:
+                return max(0.0, next_due - now)
+            heapq.heappop(self._heap)
+        return None
+
+    def record(self, url, result, entries, now=None):
+        """Schedule the next poll of url after a poll with this result"""
+        self._unrecorded.discard(url)
+        state = self._states.get(url)
+        if state is None:
+            return None
+        now = now if now is not None else time.time()
+        timestamps = [entry.get('published_ts') for entry in entries]
+        interval = self.policy.next_interval(result, timestamps, state.failures)
+        state.failures = state.failures + 1 if result.failed else 0
+        state.interval = interval
+        state.last_polled = now
+        state.next_due = now + self.policy.with_jitter(interval)
+        self._push(state)
+        return state
+
+    def requeue_unrecorded(self, now=None):
+        """Schedule feeds popped but never recorded, e.g. by a failed
+        cycle, as failed polls so they back off; returns their URLs"""
+        urls, self._unrecorded = self._unrecorded, set()
+        for url in urls:
+            self.record(url, failed_poll(), [], now)
+        return list(urls)
+
+    def _load(self):
+        try:
+            if os.path.exists(self.schedule_file):
+                with open(self.schedule_file, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for url, values in saved.items():
+                    state = FeedState(url, **values)
+                    self._states[url] = state
+                    self._push(state)
+        except Exception as e:
+            logger.error(f"Error loading feed schedule: {e}")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.schedule_file), exist_ok=True)
+            temp_file = f"{self.schedule_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({url: state.to_dict() for url, state in self._states.items()}, f)
+            os.replace(temp_file, self.schedule_file)
+        except Exception as e:
+            logger.error(f"Error saving feed schedule: {e}")
@@ -0,0 +1,82 @@
+import json
+import re
+import time
+from config import config
+from entry_store import get_entry_store
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query that matches all terms.
+
+    Terms are quoted so user input can never be parsed as FTS syntax; a
+    trailing * on a term keeps prefix search available.
+    """
+    terms = []
+    for raw in query.split():
+        prefix = raw.endswith('*')
+        for term in TERM_RE.findall(raw):
+            terms.append(f'"{term}"')
+        if prefix and terms:
+            terms[-1] += '*'
+    return ' '.join(terms)
+
+class SearchIndex:
+    """BM25-ranked search over translated titles, descriptions and keywords.
+
+    The inverted index is an FTS5 table inside the entry store, maintained
+    incrementally by triggers as entries are written or expire. It lives
+    on disk and is paged in (memory-mapped) on demand, so opening it costs
+    nothing up front.
+    """
+
+    def __init__(self, entry_store=None):
+        self.entry_store = entry_store or get_entry_store()
+        search_config = config['search']
+        weights = search_config['weights']
+        self.weights = (weights['title'], weights['description'], weights['keywords'])
+        self.page_size = search_config['page_size']
+
+    def search(self, query, category=None, hours=None, limit=None, offset=0):
+        """Return (results, total) with the best matches first"""
+        match = build_match_query(query)
+        if not match:
+            return [], 0
+        clauses = ['entries_fts MATCH ?']
+        params = [match]
+        if category:
+            clauses.append('e.category = ?')
+            params.append(category)
+        if hours:
+            clauses.append('e.published_ts > ?')
+            params.append(time.time() - hours * 3600)
+        where = ' AND '.join(clauses)
+        conn = self.entry_store.connection()
+
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM entries_fts JOIN entries e ON e.rowid = entries_fts.rowid WHERE {where}",
+            params
+        ).fetchone()[0]
+        rows = conn.execute(
+            f"""SELECT e.data, bm25(entries_fts, ?, ?, ?) AS score
+                FROM entries_fts JOIN entries e ON e.rowid = entries_fts.rowid
+                WHERE {where}
+                ORDER BY score LIMIT ? OFFSET ?""",
+            [*self.weights, *params, limit or self.page_size, offset]
+        ).fetchall()
+
+        results = []
+        for data, score in rows:
+            entry = json.loads(data)
+            # FTS5 bm25() is lower-is-better; flip it for display
+            entry['score'] = round(-score, 4)
+            results.append(entry)
+        return results, total
+
+_index = None
+
+def get_search_index():
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index
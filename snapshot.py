@@ -0,0 +1,143 @@
+import threading
+import time
+from bisect import bisect_left
+from config import config
+from entry_model import Entry
+from entry_store import entry_key, get_entry_store
+from logger import logger
+
+class Snapshot:
+    """Immutable view of the entries produced by one ingestion run.
+
+    Entries are kept newest first by published_ts, so a time window is a
+    binary search plus a slice rather than a scan of the whole archive.
+    They are held as compact Entry objects; dicts are converted.
+    """
+    __slots__ = ('generation', 'entries', 'published_at', '_neg_timestamps')
+
+    def __init__(self, generation, entries, published_at):
+        dated = []
+        undated = []
+        for entry in entries:
+            if not isinstance(entry, Entry):
+                entry = Entry.from_dict(entry)
+            (undated if entry.published_ts is None else dated).append(entry)
+        dated.sort(key=lambda entry: (entry.published_ts, entry_key(entry)), reverse=True)
+
+        object.__setattr__(self, 'generation', generation)
+        object.__setattr__(self, 'entries', tuple(dated + undated))
+        object.__setattr__(self, 'published_at', published_at)
+        object.__setattr__(self, '_neg_timestamps', [-entry.published_ts for entry in dated])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshot is immutable")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def since(self, timestamp):
+        """Entries published after timestamp (UTC epoch), newest first"""
+        return self.entries[:bisect_left(self._neg_timestamps, -timestamp)]
+
+    def iter_dated(self, before=None):
+        """Yield dated entries newest first, starting after the cursor
+        before=(timestamp, entry_id) when given"""
+        start = 0
+        if before is not None:
+            timestamp, entry_id = before
+            start = bisect_left(self._neg_timestamps, -timestamp)
+        for index in range(start, len(self._neg_timestamps)):
+            entry = self.entries[index]
+            if (before is not None and entry.published_ts == timestamp
+                    and entry_key(entry) >= entry_id):
+                continue
+            yield entry
+
+    def within_hours(self, hours, now=None):
+        """Entries younger than the given number of hours"""
+        if now is None:
+            now = time.time()
+        return self.since(now - hours * 3600)
+
+EMPTY_SNAPSHOT = Snapshot(0, (), 0.0)
+
+class SnapshotStore:
+    """Holds the current snapshot; readers never block on ingestion.
+
+    The ingestion worker calls publish() when it runs in-process. When it
+    runs as a separate process, current() starts a background check of
+    the entry store's generation at most once per refresh interval; a
+    changed generation is loaded on that thread and swapped in, so no
+    request pays for decoding the archive. Only the very first call,
+    with nothing loaded yet, waits for the load.
+    """
+
+    def __init__(self, entry_store=None):
+        self._entry_store = entry_store
+        self.refresh_interval = config['ingestion']['refresh_seconds']
+        self._snapshot = EMPTY_SNAPSHOT
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def entry_store(self):
+        if self._entry_store is None:
+            self._entry_store = get_entry_store()
+        return self._entry_store
+
+    def publish(self, entries, generation=None):
+        """Swap in a new snapshot built from entries"""
+        if generation is None:
+            generation = time.time_ns()
+        snapshot = Snapshot(generation, entries, time.time())
+        self._snapshot = snapshot
+        logger.info(f"Published snapshot {generation} with {len(snapshot)} entries")
+        return snapshot
+
+    def publish_from_store(self):
+        """Publish everything the entry store currently retains"""
+        store = self.entry_store
+        generation = store.generation()
+        return self.publish(store.load_entries(decode=Entry.from_json), generation=generation)
+
+    def refresh(self):
+        """Publish the entry store's entries if its generation changed
+        since the current snapshot; returns the current snapshot"""
+        with self._lock:
+            self._reload_if_changed()
+        return self._snapshot
+
+    def current(self):
+        """Return the latest snapshot; a newer one is loaded in the background"""
+        if self._snapshot is EMPTY_SNAPSHOT:
+            with self._lock:
+                if self._snapshot is EMPTY_SNAPSHOT and time.monotonic() >= self._next_check:
+                    self._next_check = time.monotonic() + self.refresh_interval
+                    self._reload_if_changed()
+            return self._snapshot
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            self._next_check = now + self.refresh_interval
+            try:
+                threading.Thread(target=self._reload_in_background,
+                                 name='snapshot-reload', daemon=True).start()
+            except Exception:
+                self._lock.release()
+                raise
+        return self._snapshot
+
+    def _reload_in_background(self):
+        try:
+            self._reload_if_changed()
+        finally:
+            self._lock.release()
+
+    def _reload_if_changed(self):
+        try:
+            if self.entry_store.generation() != self._snapshot.generation:
+                self.publish_from_store()
+        except Exception as e:
+            logger.error(f"Error loading snapshot from entry store: {e}")
+
+# Global snapshot store
+snapshot_store = SnapshotStore()
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+from flask import Flask
+
+import api as api_module
+from snapshot import Snapshot
+
+NOW = int(time.time())
+# Groups of three entries share a timestamp, so pages end inside a group
+DATED = [
+    {'id': f'https://example.com/{index:02d}', 'title': f'Entry {index}',
+     'link': f'https://example.com/{index:02d}', 'published_ts': NOW - (index // 3) * 60}
+    for index in range(23)
+]
+UNDATED = {'id': 'https://example.com/undated', 'title': 'Undated', 'published': 'No date'}
+
+
+class StaticSnapshots:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def current(self):
+        return self.snapshot
+
+
+@pytest.fixture
+def client(monkeypatch):
+    snapshot = Snapshot(1, DATED + [UNDATED], NOW)
+    monkeypatch.setattr(api_module, 'snapshot_store', StaticSnapshots(snapshot))
+    app = Flask(__name__)
+    app.register_blueprint(api_module.api)
+    return app.test_client()
+
+
+def test_cursor_pages_through_every_entry_once(client):
+    seen = []
+    cursor = None
+    while True:
+        query = {'limit': 5}
+        if cursor:
+            query['cursor'] = cursor
+        page = client.get('/api/entries', query_string=query).get_json()
+        assert 0 < len(page['entries']) <= 5
+        seen.extend(entry['id'] for entry in page['entries'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    newest_first = sorted(DATED, key=lambda entry: (entry['published_ts'], entry['id']), reverse=True)
+    assert seen == [entry['id'] for entry in newest_first]
+
+
+@pytest.mark.parametrize('query', [{'limit': 0}, {'limit': -1}, {'cursor': 'not-a-cursor'}])
+def test_invalid_paging_arguments_are_rejected(client, query):
+    assert client.get('/api/entries', query_string=query).status_code == 400
@@ -0,0 +1,27 @@
+from dedup import DuplicateIndex, simhash
+
+STORY = ("City council approves new tram line connecting the airport with the "
+         "central station, construction to start next spring")
+
+
+def test_near_duplicate_is_found():
+    index = DuplicateIndex(max_distance=6, window_hours=1, max_items=100)
+    index.add(simhash(STORY), 'original')
+    # Same story from another feed, one word edited
+    rewrite = STORY.replace('next spring', 'this spring')
+    assert (simhash(STORY) ^ simhash(rewrite)).bit_count() <= 6
+    record = index.find(simhash(rewrite))
+    assert record is not None and record.key == 'original'
+
+
+def test_unrelated_story_is_not_found():
+    index = DuplicateIndex(max_distance=6, window_hours=1, max_items=100)
+    index.add(simhash(STORY), 'original')
+    other = "Local football club signs young striker from the second division on a three year deal"
+    assert index.find(simhash(other)) is None
+
+
+def test_lookup_excludes_the_entry_itself():
+    index = DuplicateIndex(max_distance=6, window_hours=1, max_items=100)
+    index.add(simhash(STORY), 'original')
+    assert index.find(simhash(STORY), exclude='original') is None
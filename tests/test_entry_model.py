@@ -0,0 +1,18 @@
+from entry_model import Entry
+
+
+def test_membership_follows_the_stored_dict():
+    entry = Entry.from_dict({'id': 'a', 'title': 'A', 'published_ts': 1700000000, 'custom': 0})
+    assert 'title' in entry
+    assert 'published' in entry
+    assert 'custom' in entry
+    assert 'keywords' not in entry
+    assert 'translation_pending' not in entry
+    assert 'category' not in entry
+    assert 'missing' not in entry
+
+
+def test_set_flags_and_keywords_are_present():
+    entry = Entry.from_dict({'id': 'a', 'keywords': ['tram'], 'translation_pending': True})
+    assert 'keywords' in entry
+    assert 'translation_pending' in entry
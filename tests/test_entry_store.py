@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from entry_store import EntryStore
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EntryStore(db_file=str(tmp_path / 'entries.db'), legacy_file=None)
+
+
+def entry(key, published_ts, size=100):
+    return {'id': key, 'title': key, 'link': key, 'published_ts': published_ts,
+            'description': 'x' * size}
+
+
+def keys(store):
+    return {item['id'] for item in store.load_entries()}
+
+
+def test_retention_removes_old_dated_and_stale_undated_entries(store):
+    now = time.time()
+    old = now - store.retention - DAY
+    store.upsert([entry('old', old), entry('new', now), entry('undated', None)])
+    # Undated entries age from their last write
+    store.connection().execute("UPDATE entries SET updated_at = ? WHERE key = 'undated'", (old,))
+
+    assert store.apply_retention(now=now) == 2
+    assert keys(store) == {'new'}
+
+
+def test_undated_entries_are_kept_while_recently_written(store):
+    now = time.time()
+    store.upsert([entry('undated', None)])
+    assert store.apply_retention(now=now) == 0
+    assert keys(store) == {'undated'}
+
+
+def test_compaction_returns_freed_pages(store):
+    conn = store.connection()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    old = time.time() - store.retention - DAY
+    store.upsert([entry(f'old-{index}', old, size=4000) for index in range(200)])
+    store.upsert([entry('new', time.time())])
+    pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    assert store.compact() == 200
+    assert keys(store) == {'new'}
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert conn.execute("PRAGMA page_count").fetchone()[0] < pages_before / 4
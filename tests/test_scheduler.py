@@ -0,0 +1,22 @@
+from scheduler import FeedScheduler, PollPolicy, PollResult
+
+URLS = ['https://example.com/a.xml', 'https://example.com/b.xml']
+
+
+def test_feeds_a_failed_cycle_did_not_record_are_scheduled_again(tmp_path):
+    scheduler = FeedScheduler(schedule_file=str(tmp_path / 'schedule.json'), policy=PollPolicy())
+    scheduler.sync(URLS)
+    now = max(state.next_due for state in scheduler._states.values())
+    assert scheduler.pop_due(now) == URLS
+
+    # Only the first feed finished before the cycle failed
+    result = PollResult()
+    result.status = 200
+    scheduler.record(URLS[0], result, [], now=now)
+    assert scheduler.requeue_unrecorded(now=now) == [URLS[1]]
+    assert scheduler.pop_due(now) == []
+
+    state = scheduler._states[URLS[1]]
+    assert state.failures == 1
+    assert now < state.next_due
+    assert URLS[1] in scheduler.pop_due(state.next_due)
@@ -0,0 +1,60 @@
+import time
+
+from scheduler import PollPolicy, PollResult
+from work_queue import LeasedFeedQueue
+
+URL = 'https://example.com/feed.xml'
+
+
+def make_queue(db_file, owner):
+    return LeasedFeedQueue(db_file=str(db_file), owner=owner, policy=PollPolicy(),
+                           lease_seconds=60, claim_limit=10)
+
+
+def ok_result():
+    result = PollResult()
+    result.status = 200
+    return result
+
+
+def lease(queue):
+    return queue._connect().execute(
+        "SELECT owner, last_polled FROM feed_queue WHERE url = ?", (URL,)
+    ).fetchone()
+
+
+def test_expired_lease_is_claimed_again_and_stale_record_ignored(tmp_path):
+    db_file = tmp_path / 'work_queue.db'
+    first = make_queue(db_file, 'worker-a')
+    second = make_queue(db_file, 'worker-b')
+    first.sync([URL])
+
+    now = time.time()
+    assert first.pop_due(now) == [URL]
+    assert second.pop_due(now + 30) == []
+
+    # worker-a stalls past its lease; worker-b takes the feed over
+    assert second.pop_due(now + 61) == [URL]
+    assert lease(second) == ('worker-b', None)
+
+    # worker-a's late result must not release worker-b's lease
+    first.record(URL, ok_result(), [], now=now + 62)
+    assert lease(second) == ('worker-b', None)
+
+    second.record(URL, ok_result(), [], now=now + 63)
+    assert lease(second) == (None, now + 63)
+
+
+def test_leases_a_failed_cycle_did_not_record_are_released_with_backoff(tmp_path):
+    queue = make_queue(tmp_path / 'work_queue.db', 'worker-a')
+    queue.sync([URL])
+    now = time.time()
+    assert queue.pop_due(now) == [URL]
+
+    assert queue.requeue_unrecorded(now=now) == [URL]
+    owner, next_due, failures = queue._connect().execute(
+        "SELECT owner, next_due, failures FROM feed_queue WHERE url = ?", (URL,)
+    ).fetchone()
+    assert (owner, failures) == (None, 1)
+    assert next_due > now
+    assert queue.requeue_unrecorded(now=now) == []
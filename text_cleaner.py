@@ -0,0 +1,111 @@
+"""Description cleaning that runs before translation.
+
+Feed summaries arrive as HTML with read-more links and per-site footers.
+Stripping them first means the translator and the translation cache only
+see the text that ends up on the page.
+"""
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+from config import config
+
+# Tags whose content is never text
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe'}
+# Tags that separate blocks of text
+BLOCK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'table', 'blockquote',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'figure', 'figcaption', 'hr'}
+WHITESPACE_RE = re.compile(r'\s+')
+# End of a sentence: punctuation, optional closing quote/bracket, then space
+SENTENCE_END_RE = re.compile(r'[.!?…]["\'”’)\]]*(?=\s)')
+
+class HTMLStripper(HTMLParser):
+    """Streaming HTML-to-text converter; keeps no tree, only the text"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self):
+        return ''.join(self._parts)
+
+def strip_html(html):
+    """Plain text of an HTML fragment, one line per block"""
+    if not html:
+        return ''
+    if '<' not in html and '&' not in html:
+        text = html
+    else:
+        stripper = HTMLStripper()
+        stripper.feed(html)
+        stripper.close()
+        text = stripper.text()
+    lines = (WHITESPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+@lru_cache(maxsize=128)
+def boilerplate_patterns(host):
+    """Compiled boilerplate patterns for a feed host, plus the global ones"""
+    rules = config['description'].get('boilerplate') or {}
+    patterns = list(rules.get('*') or [])
+    for rule_host, host_patterns in rules.items():
+        if rule_host != '*' and (host == rule_host or host.endswith('.' + rule_host)):
+            patterns.extend(host_patterns or [])
+    return [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in patterns]
+
+def remove_boilerplate(text, url=''):
+    """Drop description.boilerplate matches for the feed at url"""
+    host = (urlparse(url).hostname or '').lower()
+    for pattern in boilerplate_patterns(host):
+        text = pattern.sub('', text)
+    return text
+
+def truncate_text(text, max_length, suffix=None):
+    """Shorten text to max_length, preferably after a whole sentence,
+    otherwise at a word boundary with suffix appended"""
+    if suffix is None:
+        suffix = config['description']['truncation_suffix']
+    if not text or len(text) <= max_length:
+        return text
+    limit = max_length - len(suffix)
+    head = text[:limit + 1]
+    sentence_ends = [match.end() for match in SENTENCE_END_RE.finditer(head)]
+    if sentence_ends and sentence_ends[-1] >= max_length // 2:
+        return text[:sentence_ends[-1]]
+    cut = head.rfind(' ')
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip(' ,;:-–—') + suffix
+
+def clean_description(html, url=''):
+    """Text of a feed description ready for translation: markup and
+    boilerplate removed, cut to description.max_length"""
+    description_config = config['description']
+    if not html:
+        return ''
+    if not description_config['clean_html']:
+        return html
+    text = remove_boilerplate(strip_html(html), url)
+    text = WHITESPACE_RE.sub(' ', text).strip()
+    return truncate_text(text, description_config['max_length'])
@@ -0,0 +1,365 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import config
+from language import LanguageMemo
+from text_cleaner import truncate_text
+from logger import logger
+
+class TranslationBackend:
+    """Interface for translation services.
+
+    translate_batch() runs on a worker thread, never on the event loop. It
+    returns one result per input text, or None for texts that failed.
+    """
+    name = 'base'
+
+    def translate_batch(self, texts, source, target):
+        raise NotImplementedError
+
+class GoogleBackend(TranslationBackend):
+    """deep_translator's GoogleTranslator, one instance per worker thread"""
+    name = 'google'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _get_translator(self, source, target):
+        from deep_translator import GoogleTranslator
+        translators = getattr(self._local, 'translators', None)
+        if translators is None:
+            translators = self._local.translators = {}
+        key = (source, target)
+        if key not in translators:
+            translators[key] = GoogleTranslator(source=source, target=target)
+        return translators[key]
+
+    def translate_batch(self, texts, source, target):
+        translator = self._get_translator(source, target)
+        results = []
+        for text in texts:
+            try:
+                results.append(translator.translate(text))
+            except Exception as e:
+                logger.warning(f"Translation failed: {e}")
+                results.append(None)
+        return results
+
+class FakeBackend(TranslationBackend):
+    """Offline backend for benchmarks: echoes the text after a fixed delay"""
+    name = 'fake'
+
+    def __init__(self, latency_ms=0, per_text_ms=0):
+        self.latency = latency_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self.calls = 0
+
+    def translate_batch(self, texts, source, target):
+        self.calls += 1
+        delay = self.latency + self.per_text * len(texts)
+        if delay:
+            time.sleep(delay)
+        return list(texts)
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+class TokenBucket:
+    """Allows rate backend calls per second on average, in bursts of up
+    to burst calls; acquire() waits on the event loop for a token"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """Fails fast while the backend is down.
+
+    After failure_threshold consecutive failed calls the circuit opens and
+    no calls are made for reset_seconds. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def is_open(self):
+        """True while calls would be refused"""
+        if self.opened_at is None:
+            return False
+        return self._trial or time.monotonic() - self.opened_at < self.reset_seconds
+
+    def allow(self):
+        """Whether a call may go ahead; takes the trial slot when due"""
+        if self.opened_at is None:
+            return True
+        if self.is_open:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Translation backend recovered, closing circuit")
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Translation backend failed {self.failures} times in a row, "
+                               f"pausing it for {self.reset_seconds}s")
+            self.opened_at = time.monotonic()
+
+def create_backend(name=None, **kwargs):
+    """Create a translation backend by its config name"""
+    if name is None:
+        name = config['translation']['backend']
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name}")
+
+class TranslationEngine:
+    """Batches, deduplicates and offloads translation requests.
+
+    Concurrent translate() calls for the same text share one future. New
+    texts are queued and flushed as a batch once batch_size is reached or
+    batch_delay_ms has passed; each batch runs on a bounded thread pool.
+    Text detected as already in the target language is returned as is.
+
+    Backend calls go through a token bucket, failed texts are retried with
+    exponential backoff and full jitter, and a circuit breaker makes
+    requests fail at once while the backend keeps failing. A batch that
+    still fails is split into single texts, so only the texts the backend
+    rejects come back as None.
+    """
+
+    def __init__(self, backend, cache=None, source=None, target=None,
+                 batch_size=None, batch_delay_ms=None, max_workers=None, languages=None,
+                 governor=None):
+        tr_config = config['translation']
+        governor = governor or tr_config['governor']
+        self.backend = backend
+        self.cache = cache
+        self.source = source or tr_config['source_language']
+        self.target = target or tr_config['target_language']
+        self.max_text_length = tr_config['max_text_length']
+        self.batch_size = batch_size or tr_config['batch_size']
+        self.batch_delay = (batch_delay_ms if batch_delay_ms is not None
+                            else tr_config['batch_delay_ms']) / 1000
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or tr_config['max_workers'],
+            thread_name_prefix='translate'
+        )
+        # SQLite calls can wait up to 30 s on a write lock held by another
+        # ingestion process; one thread keeps them off the event loop
+        self._cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='translation-cache')
+        if languages is None and tr_config['language_detection']['enabled']:
+            languages = LanguageMemo()
+        self.languages = languages
+        self.bucket = TokenBucket(governor['rate_per_second'], governor['burst'])
+        self.breaker = CircuitBreaker(governor['failure_threshold'], governor['reset_seconds'])
+        self.max_retries = governor['max_retries']
+        self.backoff_base = governor['backoff_base_ms'] / 1000
+        self.backoff_max = governor['backoff_max_ms'] / 1000
+        self.call_timeout = governor['call_timeout_seconds']
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0,
+                      'backend_calls': 0, 'texts_translated': 0, 'failures': 0,
+                      'skipped_target_language': 0, 'skipped_chars': 0,
+                      'retries': 0, 'rejected': 0}
+        self._loop = None
+
+    def _bind_loop(self):
+        # Pending work belongs to the loop it was queued on; each
+        # ingestion cycle runs its own asyncio.run() loop.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._inflight = {}
+            self._pending = []
+            self._flush_handle = None
+            self._tasks = set()
+        return loop
+
+    async def translate(self, text, feed=None):
+        """Translate text, returning the source text if translation fails"""
+        translated = await self.try_translate(text, feed)
+        return text if translated is None else translated
+
+    async def try_translate(self, text, feed=None):
+        """Translate text, or return None if the backend failed or is
+        paused. feed (its URL) lets short texts fall back to the feed's
+        language."""
+        if not text or not text.strip():
+            return text
+        if self.languages is not None and self.languages.detect(text, feed) == self.target:
+            self.stats['skipped_target_language'] += 1
+            self.stats['skipped_chars'] += len(text)
+            return text
+        if len(text) > self.max_text_length:
+            text = truncate_text(text, self.max_text_length)
+        self.stats['requests'] += 1
+
+        if self.cache is not None:
+            try:
+                cached = await asyncio.get_running_loop().run_in_executor(
+                    self._cache_executor, self.cache.get, text, self.source, self.target
+                )
+            except Exception as e:
+                logger.error(f"Error reading translation cache: {e}")
+                cached = None
+            if cached:
+                self.stats['cache_hits'] += 1
+                return cached
+
+        if self.breaker.is_open:
+            self.stats['rejected'] += 1
+            return None
+
+        loop = self._bind_loop()
+        future = self._inflight.get(text)
+        if future is not None:
+            self.stats['coalesced'] += 1
+        else:
+            future = loop.create_future()
+            self._inflight[text] = future
+            self._pending.append(text)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_delay, self._flush)
+        return await asyncio.shield(future)
+
+    async def translate_many(self, texts):
+        return await asyncio.gather(*(self.translate(text) for text in texts))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _call_backend(self, texts):
+        """One governed backend call; None for every text on error"""
+        await self.bucket.acquire()
+        self.stats['backend_calls'] += 1
+        try:
+            # A hung call keeps its worker thread, but not the batch
+            return await asyncio.wait_for(self._loop.run_in_executor(
+                self._executor, self.backend.translate_batch, texts, self.source, self.target
+            ), self.call_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Translation batch of {len(texts)} timed out")
+        except Exception as e:
+            logger.error(f"Translation batch of {len(texts)} failed: {e}")
+        return [None] * len(texts)
+
+    async def _call_and_collect(self, texts, translations):
+        """One backend call; adds what it translated, returns the failed texts"""
+        results = await self._call_backend(texts)
+        failed = []
+        for text, translated in zip(texts, results):
+            if translated:
+                translations[text] = translated
+            else:
+                failed.append(text)
+        return failed
+
+    async def _translate_texts(self, texts):
+        """Translations of texts, retrying failures with backoff.
+
+        Only failed calls for a single text count against the circuit
+        breaker. A batch that keeps failing as a whole is tried one text at
+        a time, so a text the backend always rejects fails on its own
+        instead of failing, and eventually pausing, every batch it is in.
+        """
+        translations = {}
+        remaining = texts
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(self._backoff(attempt - 1))
+            if not self.breaker.allow():
+                self.stats['rejected'] += len(remaining)
+                return translations
+            failed = await self._call_and_collect(remaining, translations)
+            if len(failed) < len(remaining):
+                self.breaker.record_success()
+            elif len(remaining) == 1 or self.breaker.opened_at is not None:
+                # A failed trial call reopens the circuit whatever its size
+                self.breaker.record_failure()
+            remaining = failed
+            if not remaining:
+                return translations
+
+        if len(remaining) > 1:
+            for text in remaining:
+                if not self.breaker.allow():
+                    self.stats['rejected'] += 1
+                    continue
+                self.stats['retries'] += 1
+                if await self._call_and_collect([text], translations):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+        return translations
+
+    async def _run_batch(self, texts):
+        translations = await self._translate_texts(texts)
+        results = [translations.get(text) for text in texts]
+
+        translated_items = list(translations.items())
+        if self.cache is not None and translated_items:
+            try:
+                await self._loop.run_in_executor(
+                    self._cache_executor, self.cache.set_many, translated_items, self.source, self.target
+                )
+            except Exception as e:
+                logger.error(f"Error saving translations to cache: {e}")
+
+        for text, translated in zip(texts, results):
+            if translated:
+                self.stats['texts_translated'] += 1
+            else:
+                self.stats['failures'] += 1
+            future = self._inflight.pop(text, None)
+            if future is not None and not future.done():
+                future.set_result(translated)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import config
+from logger import logger
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['cache']['directory'])
+TRANSLATION_DB_FILE = os.path.join(CACHE_DIR, config['cache']['translation']['db_file'])
+# Legacy JSON cache, imported into the database on first start
+TRANSLATION_CACHE_FILE = os.path.join(CACHE_DIR, config['cache']['translation']['file'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('row_count', 0);
+CREATE TRIGGER IF NOT EXISTS translations_count_insert AFTER INSERT ON translations
+BEGIN UPDATE meta SET value = value + 1 WHERE name = 'row_count'; END;
+CREATE TRIGGER IF NOT EXISTS translations_count_delete AFTER DELETE ON translations
+BEGIN UPDATE meta SET value = value - 1 WHERE name = 'row_count'; END;
+"""
+
+def cache_key(text, source, target):
+    """Content hash of the text for one language pair"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{source}\0{target}\0".encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+class TranslationCache:
+    """SQLite (WAL) translation cache shared by every process on the host.
+
+    Rows are keyed by a hash of (source, target, text). The row count is
+    kept in a trigger-maintained counter and the least recently used rows
+    are found through the accessed_at index, so neither lookups nor
+    eviction scan the table.
+    """
+
+    def __init__(self, db_file=TRANSLATION_DB_FILE, legacy_file=TRANSLATION_CACHE_FILE,
+                 max_size=None, ttl_days=None):
+        cache_config = config['cache']['translation']
+        self.db_file = db_file
+        self.legacy_file = legacy_file
+        self.max_size = max_size or cache_config['max_size']
+        self.ttl = (ttl_days or cache_config['ttl_days']) * 86400
+        # Only rewrite accessed_at when it is older than this, so hot reads
+        # do not turn into a write each
+        self.touch_interval = cache_config['touch_interval_seconds']
+        self.source = config['translation']['source_language']
+        self.target = config['translation']['target_language']
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        self._migrate_json()
+        logger.info(f"Initialized translation cache with {len(self)} entries")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE name = 'row_count'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, text, source=None, target=None):
+        """Return the cached translation or None"""
+        source = source or self.source
+        target = target or self.target
+        key = cache_key(text, source, target)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT translation, created_at, accessed_at FROM translations WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        translation, created_at, accessed_at = row
+        now = time.time()
+        if now - created_at > self.ttl:
+            conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+            return None
+        if now - accessed_at > self.touch_interval:
+            conn.execute("UPDATE translations SET accessed_at = ? WHERE key = ?", (now, key))
+        return translation
+
+    def set(self, text, translation, source=None, target=None):
+        self.set_many([(text, translation)], source, target)
+
+    def set_many(self, items, source=None, target=None):
+        """Store (text, translation) pairs in a single transaction"""
+        source = source or self.source
+        target = target or self.target
+        now = time.time()
+        rows = [
+            (cache_key(text, source, target), source, target, translation, now, now)
+            for text, translation in items
+        ]
+        if not rows:
+            return
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                """INSERT INTO translations
+                   (key, source_lang, target_lang, translation, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       translation = excluded.translation,
+                       created_at = excluded.created_at,
+                       accessed_at = excluded.accessed_at""",
+                rows
+            )
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _evict(self, conn):
+        # Drop the least recently used 10% once the cache overflows so
+        # eviction cost is amortized over many inserts
+        overflow = len(self) - self.max_size
+        if overflow <= 0:
+            return
+        count = overflow + self.max_size // 10
+        conn.execute(
+            """DELETE FROM translations WHERE key IN (
+                   SELECT key FROM translations ORDER BY accessed_at LIMIT ?)""",
+            (count,)
+        )
+
+    def _migrate_json(self):
+        """Import the legacy translation_cache.json once; legacy_file=None
+        skips it"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            done = conn.execute(
+                "SELECT value FROM meta WHERE name = 'json_migrated'"
+            ).fetchone()
+            if done or not self.legacy_file or not os.path.exists(self.legacy_file):
+                conn.execute('COMMIT')
+                return
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            # TTL starts at import; the legacy timestamps would expire
+            # most of these rows on first read
+            now = time.time()
+            rows = []
+            for text, value in legacy.items():
+                translation = value.get('translation') if isinstance(value, dict) else value
+                if not isinstance(translation, str):
+                    continue
+                key = cache_key(text, self.source, self.target)
+                rows.append((key, self.source, self.target, translation, now, now))
+            conn.executemany(
+                """INSERT OR IGNORE INTO translations
+                   (key, source_lang, target_lang, translation, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.execute("INSERT INTO meta (name, value) VALUES ('json_migrated', 1)")
+            conn.execute('COMMIT')
+            logger.info(f"Migrated {len(rows)} translations from {self.legacy_file}")
+        except Exception as e:
+            conn.execute('ROLLBACK')
+            logger.error(f"Error migrating translation cache: {e}")
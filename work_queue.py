@@ -0,0 +1,172 @@
+"""Leased feed queue for sharded ingestion.
+
+Several ingestion processes, on one host or on several hosts sharing the
+data directory, take due feeds from one SQLite table. Claiming a feed
+writes a lease (owner, expiry) in a BEGIN IMMEDIATE transaction, so each
+feed has exactly one owner per poll; a lease left behind by a crashed
+worker expires after sharding.lease_seconds and the feed is claimed again.
+
+LeasedFeedQueue has the same interface as FeedScheduler, so the ingestion
+worker and get_feeds_async() drive either one. The data directory must be
+on a filesystem with working POSIX locks for SQLite.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from config import config
+from logger import logger
+from scheduler import PollPolicy, failed_poll
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config['feeds']['output']['directory'])
+QUEUE_DB_FILE = os.path.join(DATA_DIR, config['sharding']['db_file'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_queue (
+    url TEXT PRIMARY KEY,
+    next_due REAL NOT NULL,
+    interval REAL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_polled REAL,
+    owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS feed_queue_due ON feed_queue (next_due);
+"""
+
+def default_owner():
+    """Identity of this worker process across hosts"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LeasedFeedQueue:
+    """Due feeds handed out under expiring leases, stored in SQLite"""
+
+    def __init__(self, db_file=QUEUE_DB_FILE, owner=None, policy=None,
+                 lease_seconds=None, claim_limit=None):
+        sharding_config = config['sharding']
+        self.db_file = db_file
+        self.owner = owner or default_owner()
+        self.policy = policy or PollPolicy()
+        self.lease_seconds = lease_seconds or sharding_config['lease_seconds']
+        self.claim_limit = claim_limit or sharding_config['claim_limit']
+        self._failures = {}
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(conn)
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM feed_queue").fetchone()[0]
+
+    def sync(self, urls):
+        """Track exactly these feeds; new ones are due immediately.
+        Safe to call from every worker."""
+        urls = list(dict.fromkeys(urls))
+        now = time.time()
+
+        def work(conn):
+            conn.executemany(
+                "INSERT OR IGNORE INTO feed_queue (url, next_due) VALUES (?, ?)",
+                [(url, now) for url in urls]
+            )
+            known = {url for (url,) in conn.execute("SELECT url FROM feed_queue")}
+            removed = known - set(urls)
+            conn.executemany("DELETE FROM feed_queue WHERE url = ?", [(url,) for url in removed])
+        self._transaction(work)
+
+    def pop_due(self, now=None):
+        """Lease up to claim_limit due feeds to this worker, most overdue
+        first; feeds under someone else's live lease are skipped"""
+        now = now if now is not None else time.time()
+
+        def work(conn):
+            rows = conn.execute(
+                """SELECT url, failures FROM feed_queue
+                   WHERE next_due <= ? AND (owner IS NULL OR lease_expires < ?)
+                   ORDER BY next_due LIMIT ?""",
+                (now, now, self.claim_limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE feed_queue SET owner = ?, lease_expires = ? WHERE url = ?",
+                [(self.owner, now + self.lease_seconds, url) for url, _ in rows]
+            )
+            return rows
+        rows = self._transaction(work)
+        for url, failures in rows:
+            self._failures[url] = failures
+        return [url for url, _ in rows]
+
+    def seconds_until_next(self, now=None):
+        """Time until a feed becomes claimable, counting live leases"""
+        now = now if now is not None else time.time()
+        row = self._connect().execute(
+            """SELECT MIN(CASE WHEN owner IS NULL THEN next_due
+                              ELSE MAX(next_due, lease_expires) END)
+               FROM feed_queue"""
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - now)
+
+    def record(self, url, result, entries, now=None):
+        """Schedule the next poll of a leased feed and release the lease.
+        Does nothing if the lease expired and another worker took it."""
+        now = now if now is not None else time.time()
+        failures = self._failures.pop(url, 0)
+        timestamps = [entry.get('published_ts') for entry in entries]
+        interval = self.policy.next_interval(result, timestamps, failures)
+        failures = failures + 1 if result.failed else 0
+        next_due = now + self.policy.with_jitter(interval)
+
+        def work(conn):
+            return conn.execute(
+                """UPDATE feed_queue
+                   SET next_due = ?, interval = ?, failures = ?, last_polled = ?,
+                       owner = NULL, lease_expires = NULL
+                   WHERE url = ? AND owner = ?""",
+                (next_due, interval, failures, now, url, self.owner)
+            ).rowcount
+        if not self._transaction(work):
+            logger.warning(f"Lease on {url} was lost before the poll finished")
+        return next_due
+
+    def requeue_unrecorded(self, now=None):
+        """Schedule feeds leased but never recorded, e.g. by a failed
+        cycle, as failed polls so they back off; returns their URLs"""
+        urls = list(self._failures)
+        for url in urls:
+            self.record(url, failed_poll(), [], now)
+        return urls
+
+    def release(self):
+        """Give back every lease this worker holds, e.g. on shutdown"""
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE feed_queue SET owner = NULL, lease_expires = NULL WHERE owner = ?",
+            (self.owner,)
+        ))
+        self._failures.clear()
+
+    def save(self):
+        # Every change is committed as it happens
+        pass
@@ -0,0 +1,45 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from config import config
+from logger import logger
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_size():
+    """Number of worker processes; 0 in config means one per core"""
+    return config['workers']['processes'] or os.cpu_count() or 1
+
+def get_process_pool():
+    """Shared process pool for CPU-bound work, created on first use.
+
+    Workers are spawned, not forked: the parent may be the multi-threaded
+    web process, and a fork would copy its held locks and open SQLite
+    connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_size(),
+                                        mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(shutdown_process_pool)
+            logger.info(f"Started process pool with {pool_size()} workers")
+        return _pool
+
+def reset_process_pool():
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)